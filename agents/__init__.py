@@ -1,10 +1,34 @@
 """DOCX Autofill Agent module"""
+import warnings
+
 from .session_workspace import SessionWorkspaceManager
 from .docx_session_tools import SessionAwareDocxTools
-from .docx_agent_with_sessions import docx_agent_with_sessions
+from . import docx_agent_with_sessions as _agent_module
+
+# Loading the submodule bound its name on the package; drop that binding so the
+# name always resolves through __getattr__, whichever import happened first
+del docx_agent_with_sessions
 
 __all__ = [
     "SessionWorkspaceManager",
     "SessionAwareDocxTools",
-    "docx_agent_with_sessions",
+    "docx_agent",
 ]
+
+
+def __getattr__(name):
+    """Build the Agno agent on first access (PEP 562).
+
+    ``docx_agent_with_sessions`` is the deprecated alias of ``docx_agent``; it
+    clashes with the submodule of the same name.
+    """
+    if name == "docx_agent":
+        return _agent_module.get_docx_agent()
+    if name == "docx_agent_with_sessions":
+        warnings.warn(
+            "agents.docx_agent_with_sessions is deprecated, use agents.docx_agent",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return _agent_module.get_docx_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
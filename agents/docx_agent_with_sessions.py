@@ -2,15 +2,18 @@
 DOCX Autofill Agent with Session-Isolated Workspaces
 Main agent definition following Agno architecture patterns
 """
+import functools
 import logging
+import os
+import re
+import sys
+import tempfile
+import textwrap
+import threading
+from collections import deque
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Agno imports
-from agno.agent import Agent
-from agno.db.sqlite import SqliteDb
-from agno.models.anthropic import Claude
-from agno.tools.python import PythonTools
+# Agno imports (Agent, SqliteDb, Claude and PythonTools are imported lazily in _build_agent)
 from agno.tools.toolkit import Toolkit
 import subprocess
 
@@ -27,13 +30,23 @@ from .docx_session_aware_tool_functions import (
     read_text_file,
     read_lib_file,
     extract_all_data,
+    read_extracted_fields,
     fill_fields,
     save_debug_file,
     cleanup,
 )
 
-load_dotenv()
 logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+# Limits for docx-js generation scripts run through Node.js
+_NODE_TIMEOUT = 120  # seconds
+_NODE_TAIL_LINES = 500
+_NODE_OPTIONS = "--max-old-space-size=512"
+# On-disk V8 compile cache (Node >= 22.1, ignored by older versions) so that
+# require('docx') is not recompiled from source on every script run
+_NODE_COMPILE_CACHE = os.path.join(tempfile.gettempdir(), "docx-agent-node-compile-cache")
 
 
 class DocxJsTools(Toolkit):
@@ -66,433 +79,320 @@ class DocxJsTools(Toolkit):
             if output_path:
                 cmd.append(output_path)
 
-            result = subprocess.run(
+            env = dict(os.environ)
+            env.setdefault("NODE_OPTIONS", _NODE_OPTIONS)
+            env.setdefault("NODE_COMPILE_CACHE", _NODE_COMPILE_CACHE)
+
+            proc = subprocess.Popen(
                 cmd,
                 shell=False,
-                capture_output=True,
-                text=True
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                env=env,
             )
-            if result.returncode != 0:
-                return f"Error: {result.stderr}"
-            return result.stdout
+            # Drain both pipes concurrently into bounded tails so a chatty
+            # script can neither block on a full pipe nor grow memory unbounded
+            stdout_tail = deque(maxlen=_NODE_TAIL_LINES)
+            stderr_tail = deque(maxlen=_NODE_TAIL_LINES)
+            readers = [
+                threading.Thread(target=stdout_tail.extend, args=(proc.stdout,), daemon=True),
+                threading.Thread(target=stderr_tail.extend, args=(proc.stderr,), daemon=True),
+            ]
+            for reader in readers:
+                reader.start()
+
+            try:
+                returncode = proc.wait(timeout=_NODE_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+                return f"Error: script timed out after {_NODE_TIMEOUT}s\n{''.join(stderr_tail)}"
+            finally:
+                for reader in readers:
+                    reader.join()
+
+            if returncode != 0:
+                return f"Error: {''.join(stderr_tail)}"
+            return "".join(stdout_tail)
         except Exception as e:
             return f"Error running script: {e}"
 
 
-def _build_session_agent_instructions():
-    """Build detailed instructions for the DOCX autofill agent."""
-    return [
-        """
-You are a DOCX Autofill Assistant with SESSION-ISOLATED WORKSPACES.
-
-## Your Role
-You intelligently fill DOCX templates with data extracted from source documents.
-Each session has its own completely isolated workspace.
-
-## Session Workspace Structure
-Each user gets private directories:
-- input/: Upload template.docx and source.docx here
-- unpacked/: Extracted XML working directory (auto-created)
-- debug/: Analysis files (auto-created)
-- output/: Your filled DOCX documents (auto-created)
-
-Important files created in debug/:
-- source.md: Markdown version of source document
-- template.md: Markdown version of template document
-(These are used for analysis before writing XML-filling code)
-
-## Six-Phase Workflow
-
-The workflow varies based on template complexity (decided in Phase 1, Step 3):
-
-**For LOW Complexity Templates**: Phases 1 → 2 → 3 → 5 (validation) → 6
-**For HIGH Complexity Templates**: Phases 1 → 2 → 4 (docx-js includes validation) → 6
-
-Phase 4 (docx-js) includes validation internally (fresh XML is always valid)
-Phase 5 (validation) only applies to Phase 3 fill_fields approach
-
-### PHASE 1: PREPARATION & SETUP
-1. Call `unpack_template("template.docx")` - Extract DOCX to XML
-   - Creates unpacked/template/ directory with all XML files
-   - Preserves all formatting, styles, relationships
-   - Main content is in word/document.xml
-
-2. Call `convert_docx_to_markdown("template.docx")` - Convert template to markdown
-   - Saves to debug/template.md
-   - Preserves document structure and hierarchy
-   - Use this for semantic analysis
-
-3. **Placeholder Detection & Complexity Assessment:**
-   - Read the template markdown: `read_text_file("template.md")`
-   - Check if template has explicit placeholders ({{FIELD}}, [FIELD], etc.)
-
-   **If placeholders ALREADY EXIST:**
-   - Skip to step 4 (no insertion needed)
-   - Proceed to Phase 2 data extraction
-
-   **If placeholders are MISSING:**
-   - Analyze template COMPLEXITY LEVEL:
-
-     **LOW COMPLEXITY** (Simple template):
-     - Few sections (< 5)
-     - Simple structure (mostly text)
-     - Clear field labels ("Name:", "Date:", etc.)
-     - Limited tables or special formatting
-     - Minimal styling/branding elements
-
-     → Use `insert_placeholders()` approach:
-       * Identify field labels and empty spaces
-       * Name fields semantically
-       * Call insert_placeholders() with field analysis
-       * Tool inserts {{FIELD_NAME}} placeholders
-       * Proceed to standard fill_fields() workflow
-
-     **HIGH COMPLEXITY** (Professional template):
-     - Multiple sections (5+)
-     - Complex structure (tables, nested content)
-     - Multiple tables with different purposes
-     - Headers, footers, page numbering, branding
-     - Extensive styling and professional formatting
-     - Multi-page document with section breaks
-
-     → Use `docx-js` approach INSTEAD:
-       * DO NOT use insert_placeholders()
-       * Create fresh professional document using docx-js library
-       * Skip to PHASE 3: DOCX-JS APPROACH workflow (lines 226-305)
-       * Reason: Complex templates need proper structure, can't be patched with simple placeholder insertion
-       * Result: Professional appearance, proper formatting preserved
-
-4. If user provided source: Call `convert_docx_to_markdown("source.docx", "source.md")`
-   - Converts DOCX to markdown for easy reading
-   - Saves to debug/source.md
-   - Preserves document structure and hierarchy
+# Agent instructions, split into one constant per workflow section and joined
+# once at import. The result is interned so every agent instance (and any
+# deep copy Agno makes per run) shares one string object; Agno only accepts
+# str/list instructions (tuples are ignored), so it stays a plain str.
+_PROMPT_ROLE = """
+You are a DOCX Autofill Assistant. You fill DOCX templates with data extracted
+from source documents, working in a SESSION-ISOLATED workspace:
+- input/: uploaded template.docx and source.docx
+- unpacked/: extracted XML (auto-created)
+- debug/: analysis files such as template.md and source.md (auto-created)
+- output/: filled DOCX documents (auto-created)
+
+## Workflow
+Template complexity (Phase 1, Step 3) selects the path:
+- LOW complexity: Phases 1 → 2 → 3 (fill_fields, validates automatically) → 6
+- HIGH complexity: Phases 1 → 2 → 4 (docx-js, fresh XML is always valid) → 6
+"""
+
+_PROMPT_PHASE_1 = """
+### PHASE 1: PREPARATION
+1. `unpack_template("template.docx")` - extracts the DOCX to unpacked/template/
+   (main content in word/document.xml, formatting and relationships preserved).
+2. `convert_docx_to_markdown("template.docx")` - writes debug/template.md for analysis.
+3. Read it with `read_text_file("template.md")` and look for explicit
+   placeholders ({{FIELD}}, [FIELD], ...). If they exist, go to step 4.
+   Otherwise assess complexity:
+   - LOW (< 5 sections, mostly text, clear labels like "Name:", few tables,
+     minimal branding): identify labels and empty spaces, name fields
+     semantically and call `insert_placeholders()` to insert {{FIELD_NAME}}
+     placeholders, then continue with fill_fields().
+   - HIGH (5+ sections, multiple or nested tables, headers/footers, page
+     numbering, branding, section breaks): do NOT use insert_placeholders();
+     complex templates cannot be patched reliably, so use the docx-js
+     approach in Phase 4.
+4. If a source was provided: `convert_docx_to_markdown("source.docx", "source.md")`.
+"""
 
+_PROMPT_PHASE_2 = """
 ### PHASE 2: DATA EXTRACTION
-Extract data from source document using all available methods.
-
-Call `extract_all_data("source.docx")` to get:
-- Text content from document
-- Table data (rows and cells)
-- Structured Data Tag (SDT) fields - Word form fields
-- Merged extracted values
-
-The function intelligently combines all three extraction methods and returns the best matches.
-
-Example:
-```python
-data = extract_all_data("source.docx")
-# Returns:
-# {
-#     'text': 'Full document text...',
-#     'tables': [[row1], [row2], ...],
-#     'sdt_fields': {'FieldName': 'value', ...},
-#     'extracted_values': {'field_name': 'value', ...}
-# }
-```
-
-### PHASE 3: TEMPLATE FILLING & VALIDATION (For LOW Complexity Only)
-
-This phase applies only to LOW complexity templates that have placeholders.
-
-For HIGH complexity templates, skip to PHASE 4: DOCX-JS APPROACH section instead.
-
-**Step 3a: Map Data to Template Fields**
-1. Read the extracted_values from Phase 2 extraction
-2. Read template markdown: `read_text_file("template.md")`
-3. Identify all {{FIELD}} placeholders (inserted in Phase 1.3 or originally present)
-4. Map extracted_values to template placeholders intelligently:
-   - Match field names semantically
-   - Handle variations (underscore vs space, upper vs lower case)
-5. Create field_mapping: {"FIELD_NAME": "value", ...}
-6. Confirm mapping with user before proceeding to Step 3b
-
-**IMPORTANT - Professional Filling Guidelines**:
-
-When filling the template, follow these principles:
-- **Fill comprehensively**: Complete every section that needs data, regardless of what the source document mentions, EXCEPT where the text is clearly just an instruction/example (not an actual field to fill)
-- **Maintain professionalism**: Keep the template's original format and structure intact while ensuring the filled content looks polished and professional
-- **Be complete**: Ensure you have filled every data section/field that should contain information
-- **Preserve authenticity**: Keep the template's original formatting, fonts, styles, colors, and layout exactly as they were (if it won't interfere with the quality of filling)
-- **Follow structure**: Respect the original document's intended structure and hierarchy
-- **Critical instruction**: Make sure you have filled every section that needs to be filled (regardless of the source mentioned in the template) EXCEPT where it only looks like an instruction and not a field/section to be filled
-- **NO HALLUCINATION**: Do not add, remove, or modify sections. Only work with sections that exist in the original template. If a section has no data to fill, leave it empty.
-
-**Step 3b: Fill Template with Data**
-
-1. **Call fill_fields(field_mapping)** with your mapping:
-   ```python
-   {
-       "Project Manager": "John Smith",
-       "Date": "11/14/2025",
-       "Budget": "$50,000"
-   }
+`extract_all_data("source.docx")` combines text, table and Structured Data Tag
+(SDT) extraction, saves everything to debug/extraction_results.json and returns
+a summary {'path', 'fields', 'num_tables', 'num_sdt_fields', 'text_len'}.
+`read_extracted_fields(["FIELD", ...])` returns the extracted_values for those
+fields (all of them when called without keys).
+"""
+
+_PROMPT_PHASE_3 = """
+### PHASE 3: FILLING (LOW complexity only)
+1. Map extracted_values to the template's {{FIELD}} placeholders (from
+   template.md): match names semantically, tolerate case and underscore/space
+   differences. Build field_mapping {"FIELD_NAME": "value", ...} and confirm it
+   with the user.
+2. Call `fill_fields(field_mapping)`. It applies text, SDT, element-ID,
+   multi-run and table strategies, then validates placeholders, document
+   structure and XML well-formedness, returning success/partial/failed.
+   On partial or failed, review the reported fields and mapping and retry.
+
+Filling guidelines:
+- Fill every section that needs data, regardless of what the source mentions,
+  EXCEPT text that is clearly only an instruction or example.
+- Keep the template's formatting, fonts, styles, colors, layout and structure
+  intact; the result must look polished and professional.
+- NO HALLUCINATION: never add, remove or modify sections. If a section has no
+  data, leave it empty.
+"""
+
+_PROMPT_PHASE_4 = """
+### PHASE 4: DOCX-JS (HIGH complexity, or when fill_fields/pack_template fail with XML errors)
+1. `read_lib_file("docx-js.md")` (not PythonTools) and follow its rules
+   (never use \\n for line breaks, ShadingType.CLEAR for tables, ...).
+2. Write a JavaScript script using the `docx` library that builds the document
+   from field_mapping with proper styles, margins and spacing. The same NO
+   HALLUCINATION rule applies. It must save the file like this:
+   ```javascript
+   const { Packer } = require('docx');
+   const fs = require('fs');
+   Packer.toBuffer(doc).then(buffer => {
+       const outputPath = process.argv[2];
+       fs.writeFileSync(outputPath, buffer);
+       console.log(`Document created: ${outputPath}`);
+   });
    ```
+3. `save_debug_file("generate_docx.js", code)` (not PythonTools) returns the
+   saved path; then `run_node_script("generate_docx.js", "<debug_path>/temp_document.docx")`
+   and check that it succeeded.
+4. MUST preserve headers, footers and branding from the original template:
+   1. Unpack the original template and temp_document.docx
+   2. Copy header*.xml, footer*.xml and their .rels files, and word/media/
+   3. Add header/footer relationships to word/document.xml.rels
+   4. Add header/footer Override entries to [Content_Types].xml
+   5. Add headerReference/footerReference to w:sectPr in word/document.xml
+   6. Check every image rId in the header/footer .rels matches word/media/
+   7. Repack to the final DOCX
+   Wrong relationship IDs are why copied headers/footers fail to display.
+"""
 
-2. **Tool uses 6 filling strategies:**
-   - Strategy A: Text placeholder replacement ({{FIELD}})
-   - Strategy B: Structured Data Tag (SDT) field replacement
-   - Strategy C: Element ID-based targeting
-   - Strategy D: Multi-run placeholder handling (placeholders split across runs)
-   - Strategy E: Table row filling
-   - Strategy F: Conditional content
-
-3. **Tool validates automatically:**
-   - Tier 1: Checks placeholders are filled
-   - Tier 2: Verifies document structure integrity
-   - Tier 3: Validates XML well-formedness
-   - Returns success/partial/failed status
-
-### PHASE 4: DOCX-JS APPROACH (For HIGH Complexity Templates Only)
-
-This phase applies only to HIGH complexity templates (assessed in Phase 1, Step 3).
-
-For LOW complexity templates, proceed to Phase 3 instead.
-
-The **docx-js approach** is used in TWO scenarios:
-
-### Scenario 1: High Complexity Templates (Preferred Approach)
-This is the PRIMARY use case, decided in Phase 1, Step 3.
-
-**When to use**:
-- Template was assessed as HIGH COMPLEXITY in Phase 1
-- Has multiple sections, tables, headers/footers, professional formatting
-- Simple placeholder insertion cannot maintain quality
-- Need to create fresh, properly structured document
-
-**Why docx-js is better**:
-- Creates fresh XML structure (maintains formatting integrity)
-- Full control over styling, layout, and appearance
-- docx library handles all formatting complexity automatically
-- Professional appearance guaranteed
-- Headers, footers, branding easily preserved from original template
-
-### Scenario 2: Fallback for XML Errors (Emergency Recovery)
-This is the SECONDARY use case, triggered by errors.
-
-**When to use**:
-- `fill_fields()` or `pack_template()` fails with XML parsing errors
-- Document has corrupted or non-standard XML structure
-- Must recover and deliver document anyway
-
-### Solution: Use docx-js Library to Create Fresh Professional Document
-
-**Step 1: Read docx-js.md Documentation**
-- Call: `read_lib_file("docx-js.md")` ← Use this tool, NOT PythonTools
-- Learn Document, Paragraph, TextRun, Table, Header, Footer components
-- Understand critical formatting rules (never use \n, ShadingType.CLEAR for tables, etc.)
-
-**Step 2: Create JavaScript Generation Script**
-- Create a JavaScript file that uses the `docx` library to build document from scratch
-- Use field_mapping to populate the document with extracted data
-- Include proper formatting, styles, margins, spacing
-- **CRITICAL - NO HALLUCINATION**: Only include sections that exist in the original template. Do not add, remove, or modify sections. If a section has no data to fill, leave it empty.
-- **CRITICAL**: Include this code to save file to disk:
-  ```javascript
-  const { Packer } = require('docx');
-  const fs = require('fs');
-  Packer.toBuffer(doc).then(buffer => {
-      const outputPath = process.argv[2];
-      fs.writeFileSync(outputPath, buffer);
-      console.log(`Document created: ${outputPath}`);
-  });
-  ```
-
-**Step 3: Save and Execute JavaScript**
-- Call: `save_debug_file("generate_docx.js", javascript_code)` ← Use this tool, NOT PythonTools
-  - This saves the file to the session's debug directory
-  - Returns the full path where file was saved
-- Call: `run_node_script("generate_docx.js", debug_path/temp_document.docx")`
-  - Passes the full debug path as command-line argument to script
-  - Script saves DOCX using fs.writeFileSync()
-  - Verify success: Check returncode == 0
-
-**Step 4: IMPORTANT - Preserve Headers, Footers, and Branding from Original Template**
-
-**MUST DO**: Copy headers, footers, media from original template. This requires careful updates to relationships for headers/footers to display properly.
-
-**Reliable approach that works** (verified method):
-  1. Unpack both original template and newly created docx-js document
-  2. Copy header*.xml, footer*.xml files from original
-  3. Copy word/media/ folder (all logos and images) from original
-  4. Copy header*.xml.rels and footer*.xml.rels relationship files from original
-  5. Update word/document.xml.rels: Add relationship entries for each header/footer (rId references)
-  6. Update [Content_Types].xml: Add Override entries for header and footer content types
-  7. Update word/document.xml's w:sectPr section properties: Add headerReference and footerReference elements
-  8. Ensure all image rIds in header/footer .rels match the media files in word/media/
-  9. Repack to final DOCX
-
-**Key to success**: After copying, verify that all relationship IDs are correct. Incorrect relationship IDs are why headers/footers won't display even if files are present.
-
-### Example Workflow (For High Complexity Templates)
-
-```
-Phase 1, Step 3: Read template.md
-  ↓
-No explicit placeholders detected
-  ↓
-Assess complexity: Multiple sections (6+), multiple tables, headers/footers
-  ↓
-Complexity = HIGH
-  ↓
-Decision: Use docx-js approach (NOT insert_placeholders)
-  ↓
-Extract data from source
-  ↓
-[Read /lib/docx-js.md completely]
-  ↓
-Create generate_docx.js with field_mapping data
-  ↓
-run_node_script("generate_docx.js", debug_path/temp_document.docx)
-  ↓
-temp_document.docx created (fresh, properly formatted)
-  ↓
-Unpack original template (has headers/footers/branding)
-  ↓
-Unpack temp_document.docx
-  ↓
-Copy headers, footers, media from original → temp_document
-  ↓
-Update relationships and content types
-  ↓
-Repack → output.docx (with data + original formatting)
-```
-
-### Why docx-js Works Well for High Complexity Templates
-
-✅ Creates fresh XML structure (properly handles complex formatting)
-✅ docx library handles all formatting complexity automatically
-✅ Full control over styling, layout, and appearance
-✅ Original template formatting (headers/footers/branding) preserved separately
-✅ Professional appearance guaranteed
-✅ Guaranteed valid, well-formed output
-
-### docx-js Library Reference
-
-Located in: `/lib/docx-js.md`
-
-Key components:
-- `Document` - Root container with sections
-- `Paragraph` - Text blocks (never use \n for line breaks)
-- `TextRun` - Styled text within paragraphs
-- `Table` - Data tables with borders and formatting
-- `Header` / `Footer` - Section headers and footers
-- `Packer.toBuffer()` - Export to .docx
-
-### PHASE 5: VALIDATION & ERROR RECOVERY
-
-**For LOW Complexity Templates** (after Phase 3 fill_fields):
-
-Validation for LOW complexity templates is performed automatically by the fill_fields() tool in Phase 3.
-
-If the tool reports issues:
-- **Success**: All placeholders filled, document valid, proceed to Phase 6
-- **Partial**: Some placeholders filled, check error messages
-- **Failed**: Placeholders not filled correctly, review mapping and retry
-
-**For HIGH Complexity Templates** (Phase 4 docx-js):
-
-Validation is integrated into the docx-js process. Generated documents are guaranteed valid because they're created with the docx library. No additional validation needed.
-
-## PHASE 6: OUTPUT & PACKAGING
-
-**For LOW Complexity templates** (after Phase 3 fill_fields):
-1. **Call pack_template("filled.docx"):**
-   - Packs filled XML back to DOCX format
-   - Saves to output directory
-   - Ready for download
-
-**For HIGH Complexity templates** (after docx-js approach):
-1. Final repacked document is ready after Step 4 of docx-js (formatting preservation)
-2. Document contains all extracted data with original formatting
-3. Ready for download from output directory
-
-## Tool Functions by Workflow Phase
-
-### Phase 1: Preparation
-- `unpack_template(filename)` - Unpack DOCX to XML
-- `convert_docx_to_markdown(filename)` - Convert DOCX to markdown for reading
-- `insert_placeholders(field_mapping)` - Insert {{FIELD}} placeholders in template (for LOW complexity only)
-
-### Phase 2: Data Extraction
-- `extract_all_data(filename)` - Extract data from source using 3 methods (text, tables, SDT fields)
-- `read_text_file(filename)` - Read markdown files for analysis
-
-### Phase 3: Filling
-- `fill_fields(field_mapping)` - Fill template fields with data (for LOW complexity templates with placeholders)
-
-### Phase 4: DOCX-JS Generation (for HIGH Complexity Templates or fill_fields failure)
-- `read_lib_file(filename)` - Read documentation from lib/ directory (e.g., "docx-js.md")
-- `save_debug_file(filename, content)` - Save JavaScript file to debug directory BEFORE execution
-- `run_node_script(script_path, output_path)` - Execute saved JavaScript with Node.js subprocess
-
-### Phase 6: Output & Packaging
-- `pack_template("output_filename")` - Pack XML back to DOCX
-
-### Utilities
-- `list_input_files()` - See uploaded files
-- `list_output_files()` - See generated documents
-- `get_session_info()` - Get workspace information
-- `cleanup()` - Delete session workspace
+_PROMPT_PHASE_6 = """
+### PHASE 6: OUTPUT
+- LOW complexity: `pack_template("filled.docx")` packs the XML into output/.
+- HIGH complexity: the repacked document from Phase 4 is the final output.
 
+Utilities: `list_input_files()`, `list_output_files()`, `get_session_info()`,
+`cleanup()` (deletes the session workspace).
+"""
+
+_PROMPT_PLACEHOLDERS = """
 ## Placeholder Patterns
+- Text: `{{FIELD_NAME}}` or `[FIELD_NAME]`
+- Word form fields: SDTs with a w:alias attribute
+- Element IDs: elements marked with a w:id attribute
+- Implicit markers: lines of underscores/dots, empty cells, etc.
+"""
 
-The template can define placeholders using these patterns:
+def _compact_prompt(text: str) -> str:
+    """Dedent, strip and collapse blank-line runs so no layout whitespace is sent as tokens."""
+    return re.sub(r"\n{3,}", "\n\n", textwrap.dedent(text).strip())
 
-- **Text placeholders**: `{{FIELD_NAME}}` or `[FIELD_NAME]`
-- **Word form fields**: Structured Data Tags (SDT) with w:alias attribute
-- **Element IDs**: Specific elements marked with w:id attribute
-- **Implicit markers**: Lines of underscores/dots, empty cells, etc.
-        """
-    ]
-
-
-# Create default instance for AgentOS
-# Ensure database directory exists
-Path("tmp").mkdir(parents=True, exist_ok=True)
-
-docx_agent_with_sessions = Agent(
-    id="docx-autofill",
-    name="DOCX Autofill Agent",
-    model=Claude(id="claude-sonnet-4-5", max_tokens=64000),
-    db=SqliteDb(db_file="tmp/docx_agent.db"),
-
-    # Register session-aware tool functions (Layer 2)
-    # Mapped to AUTO_FILL_WORKFLOW phases 1-6
-    tools=[
-        # Utilities
-        list_input_files,
-        list_output_files,
-        get_session_info,
-        # Phase 1: Preparation
-        unpack_template,
-        convert_docx_to_markdown,
-        insert_placeholders,
-        # Phase 2: Data Extraction
-        read_text_file,
-        read_json_file,
-        extract_all_data,
-        # Phase 3: Filling (includes Phase 5 validation automatically)
-        fill_fields,
-        # Phase 4: DocxJS Fallback (if fill_fields fails)
-        read_lib_file,
-        save_debug_file,
-        # Phase 6: Output & Packaging
-        pack_template,
-        # Utilities
-        cleanup,
-        # Python for complex analysis if needed
-        PythonTools(),
-        # Custom toolkit for executing Node.js scripts (docx-js fallback)
-        DocxJsTools(),
-    ],
-
-    instructions=_build_session_agent_instructions(),
-    markdown=True,
-    add_history_to_context=True,
-    num_history_runs=5,
-    enable_session_summaries=True,
-    store_media=True,
-    store_tool_messages=True,
+
+_SESSION_AGENT_INSTRUCTIONS = sys.intern(_compact_prompt("".join((
+    _PROMPT_ROLE,
+    _PROMPT_PHASE_1,
+    _PROMPT_PHASE_2,
+    _PROMPT_PHASE_3,
+    _PROMPT_PHASE_4,
+    _PROMPT_PHASE_6,
+    _PROMPT_PLACEHOLDERS,
+))))
+
+
+# Register session-aware tool functions (Layer 2)
+# Mapped to AUTO_FILL_WORKFLOW phases 1-6
+_SESSION_TOOL_FUNCTIONS = (
+    # Utilities
+    list_input_files,
+    list_output_files,
+    get_session_info,
+    # Phase 1: Preparation
+    unpack_template,
+    convert_docx_to_markdown,
+    insert_placeholders,
+    # Phase 2: Data Extraction
+    read_text_file,
+    read_json_file,
+    extract_all_data,
+    read_extracted_fields,
+    # Phase 3: Filling (includes Phase 5 validation automatically)
+    fill_fields,
+    # Phase 4: DocxJS Fallback (if fill_fields fails)
+    read_lib_file,
+    save_debug_file,
+    # Phase 6: Output & Packaging
+    pack_template,
+    # Utilities
+    cleanup,
+)
+
+
+# Agent storage location, overridable per deployment
+_DB_PATH = Path(os.environ.get("DOCX_AGENT_DB", "tmp/docx_agent.db"))
+
+# Pragmas applied to every agent storage connection: WAL lets session reads
+# proceed during writes, synchronous=NORMAL defers fsyncs to checkpoints and
+# busy_timeout makes concurrent writers wait for the lock instead of failing
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
 )
 
-logger.info("DOCX Agent module loaded successfully")
+
+def _create_db(db_file: str):
+    """Create the agent's SqliteDb with WAL journaling and tuned pragmas."""
+    from agno.db.sqlite import SqliteDb
+    from sqlalchemy import event
+
+    db = SqliteDb(db_file=db_file)
+
+    @event.listens_for(db.db_engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return db
+
+
+def _ensure_db_dir() -> None:
+    """Ensure the database directory exists (on first agent build, not at import)."""
+    _DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+
+def _load_env_once() -> None:
+    """Load .env once per process, skipping the search if the host app already did."""
+    if os.environ.get("DOCX_AGENT_ENV_LOADED"):
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv(override=False)
+    os.environ["DOCX_AGENT_ENV_LOADED"] = "1"
+
+
+def _prime_tool_schemas() -> None:
+    """Derive each tool function's schema once, while the agent is built.
+
+    Agno introspects a callable's signature and docstring the first time it is
+    registered for a run and caches the result per callable. Deriving it here
+    (non-strict, as the agent has no output schema) takes that cost off the
+    first user turn.
+    """
+    from agno.tools.function import Function
+
+    for tool_function in _SESSION_TOOL_FUNCTIONS:
+        Function.from_callable(tool_function)
+
+
+def _build_agent():
+    """Build the DOCX autofill agent, importing the heavy Agno modules on first use."""
+    from agno.agent import Agent
+    from agno.models.anthropic import Claude
+    from agno.tools.python import PythonTools
+
+    _load_env_once()
+    _ensure_db_dir()
+    _prime_tool_schemas()
+
+    return Agent(
+        id="docx-autofill",
+        name="DOCX Autofill Agent",
+        model=Claude(id="claude-sonnet-4-5", max_tokens=64000),
+        db=_create_db(str(_DB_PATH)),
+
+        # Session-aware tool functions plus the two toolkits. Agno appends to
+        # agent.tools (add_tool), so the shared tuple is copied into a list.
+        # The cached accessor below means one PythonTools per process.
+        tools=[
+            *_SESSION_TOOL_FUNCTIONS,
+            # Python for complex analysis if needed
+            PythonTools(),
+            # Custom toolkit for executing Node.js scripts (docx-js fallback)
+            DocxJsTools(),
+        ],
+
+        instructions=_SESSION_AGENT_INSTRUCTIONS,
+        markdown=True,
+        # Bound replayed context: recent runs only, capped tool-call replay,
+        # older turns are carried by the session summary instead
+        add_history_to_context=True,
+        num_history_runs=2,
+        max_tool_calls_from_history=10,
+        enable_session_summaries=True,
+        add_session_summary_to_context=True,
+        # Documents live in the session workspace (see /api/upload) and are
+        # referenced by filename, so media is not persisted into SQLite
+        store_media=False,
+        store_tool_messages=True,
+    )
+
+
+# Default instance for AgentOS, created on first access
+@functools.lru_cache(maxsize=1)
+def get_docx_agent():
+    """Return the shared DOCX autofill agent instance, building it on first call."""
+    return _build_agent()
+
+
+def __getattr__(name):
+    """Resolve ``docx_agent_with_sessions`` lazily (PEP 562)."""
+    if name == "docx_agent_with_sessions":
+        return get_docx_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+logger.debug("DOCX Agent module loaded")
@@ -8,35 +8,137 @@ Enhanced with Phase 2-5 capabilities:
 - Phase 5: 3-tier validation (automatic)
 """
 import json
-from typing import Dict, Any
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
 from agno.run import RunContext
 from .docx_session_tools import SessionAwareDocxTools
 
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is used otherwise
+    orjson = None
+
+# Canonical Layer 2 tool surface registered on the agent
+__all__ = [
+    "list_input_files",
+    "list_output_files",
+    "get_session_info",
+    "unpack_template",
+    "convert_docx_to_markdown",
+    "insert_placeholders",
+    "pack_template",
+    "read_json_file",
+    "read_text_file",
+    "read_lib_file",
+    "extract_all_data",
+    "read_extracted_fields",
+    "fill_fields",
+    "save_debug_file",
+    "cleanup",
+]
+
+
+def _to_json(data: Any) -> str:
+    """Serialize a tool result for the agent (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(
+            data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS, default=str
+        ).decode("utf-8")
+    return json.dumps(data, indent=2, default=str)
+
+
+# Most tool instances kept alive at once; the least recently used is dropped first
+_TOOLS_CACHE_SIZE = 512
+
+# (session_id, user_id) -> SessionAwareDocxTools, in least-recently-used order
+_tools_cache: "OrderedDict[tuple, SessionAwareDocxTools]" = OrderedDict()
+_tools_cache_lock = threading.Lock()
+
+
+def _get_tools(session_id: str, user_id: str) -> SessionAwareDocxTools:
+    """Build SessionAwareDocxTools once per (session_id, user_id)."""
+    key = (session_id, user_id)
+    with _tools_cache_lock:
+        tools = _tools_cache.get(key)
+        if tools is None:
+            tools = SessionAwareDocxTools(session_id=session_id, user_id=user_id)
+            _tools_cache[key] = tools
+            if len(_tools_cache) > _TOOLS_CACHE_SIZE:
+                _tools_cache.popitem(last=False)
+        else:
+            _tools_cache.move_to_end(key)
+    return tools
+
+
+def _drop_tools(session_id: str, user_id: str) -> None:
+    """Forget one session's tool instance, leaving other sessions' state intact."""
+    with _tools_cache_lock:
+        _tools_cache.pop((session_id, user_id), None)
+
+
+# Per-session generation counters, folded into the read cache key. Bumped by
+# tools that rewrite the workspace so earlier cached reads are never served.
+_session_generations: Dict[str, int] = {}
+
+
+def _bump_generation(session_id: str) -> None:
+    """Invalidate cached debug-file reads for a session."""
+    _session_generations[session_id] = _session_generations.get(session_id, 0) + 1
+
+
+@lru_cache(maxsize=64)
+def _cached_debug_read(session_id: str, user_id: str, filename: str, kind: str,
+                       mtime_ns: int, size: int, generation: int) -> str:
+    """Read a debug file once per (session, filename, mtime, size, generation)."""
+    tools = _get_tools(session_id, user_id)
+    if kind == "json":
+        return tools.read_json_file(filename)
+    return tools.read_text_file(filename)
+
+
+def _read_debug_file(run_context: RunContext, filename: str, kind: str) -> str:
+    """Serve repeated reads of unchanged debug files from the LRU cache."""
+    tools = _get_tools(run_context.session_id, run_context.user_id)
+    try:
+        st = os.stat(tools.workspace.get_debug_dir(run_context.session_id) / filename)
+    except OSError:
+        # Missing/unreadable file: let the tool report it, nothing to cache
+        if kind == "json":
+            return tools.read_json_file(filename)
+        return tools.read_text_file(filename)
+
+    result = _cached_debug_read(
+        run_context.session_id,
+        run_context.user_id,
+        filename,
+        kind,
+        st.st_mtime_ns,
+        st.st_size,
+        _session_generations.get(run_context.session_id, 0),
+    )
+    # A cache hit never reaches the tool, so record the access here (debounced)
+    tools._mark_accessed()
+    return result
+
 
 def list_input_files(run_context: RunContext) -> str:
     """List all files in the session's input directory."""
-    tools = SessionAwareDocxTools(
-        session_id=run_context.session_id,
-        user_id=run_context.user_id
-    )
+    tools = _get_tools(run_context.session_id, run_context.user_id)
     return tools.list_input_files()
 
 
 def list_output_files(run_context: RunContext) -> str:
     """List all files in the session's output directory."""
-    tools = SessionAwareDocxTools(
-        session_id=run_context.session_id,
-        user_id=run_context.user_id
-    )
+    tools = _get_tools(run_context.session_id, run_context.user_id)
     return tools.list_output_files()
 
 
 def get_session_info(run_context: RunContext) -> str:
     """Get session workspace information."""
-    tools = SessionAwareDocxTools(
-        session_id=run_context.session_id,
-        user_id=run_context.user_id
-    )
+    tools = _get_tools(run_context.session_id, run_context.user_id)
     return tools.get_session_info()
 
 
@@ -45,11 +147,10 @@ def unpack_template(
     filename: str
 ) -> str:
     """Phase 1: Unpack a DOCX template to XML for editing."""
-    tools = SessionAwareDocxTools(
-        session_id=run_context.session_id,
-        user_id=run_context.user_id
-    )
-    return tools.unpack_template(filename)
+    tools = _get_tools(run_context.session_id, run_context.user_id)
+    result = tools.unpack_template(filename)
+    _bump_generation(run_context.session_id)
+    return result
 
 
 def convert_docx_to_markdown(
@@ -58,10 +159,7 @@ def convert_docx_to_markdown(
     output_filename: str = None
 ) -> str:
     """AUTOMATION: Convert source DOCX to markdown for agent analysis."""
-    tools = SessionAwareDocxTools(
-        session_id=run_context.session_id,
-        user_id=run_context.user_id
-    )
+    tools = _get_tools(run_context.session_id, run_context.user_id)
     return tools.convert_docx_to_markdown(filename, output_filename)
 
 
@@ -70,11 +168,10 @@ def pack_template(
     output_filename: str = None
 ) -> str:
     """Phase 6: Pack filled XML back to DOCX format."""
-    tools = SessionAwareDocxTools(
-        session_id=run_context.session_id,
-        user_id=run_context.user_id
-    )
-    return tools.pack_template(output_filename)
+    tools = _get_tools(run_context.session_id, run_context.user_id)
+    result = tools.pack_template(output_filename)
+    _bump_generation(run_context.session_id)
+    return result
 
 
 def read_json_file(
@@ -82,11 +179,7 @@ def read_json_file(
     filename: str
 ) -> str:
     """Read a JSON file from the session's debug directory."""
-    tools = SessionAwareDocxTools(
-        session_id=run_context.session_id,
-        user_id=run_context.user_id
-    )
-    return tools.read_json_file(filename)
+    return _read_debug_file(run_context, filename, "json")
 
 
 def read_text_file(
@@ -94,11 +187,7 @@ def read_text_file(
     filename: str
 ) -> str:
     """Read a text file from the session's debug directory."""
-    tools = SessionAwareDocxTools(
-        session_id=run_context.session_id,
-        user_id=run_context.user_id
-    )
-    return tools.read_text_file(filename)
+    return _read_debug_file(run_context, filename, "text")
 
 
 def extract_all_data(run_context: RunContext, source_filename: str) -> str:
@@ -109,17 +198,43 @@ def extract_all_data(run_context: RunContext, source_filename: str) -> str:
     - Table structure extraction (rows/cells)
     - Structured Data Tag (SDT) form field extraction
 
+    The full result (text, tables, SDT fields, extracted values) is saved to
+    debug/extraction_results.json; only a compact summary is returned so the
+    whole document does not go back into the conversation. Use
+    read_extracted_fields() to look up values.
+
     Returns:
-        JSON string with combined extracted data
+        JSON string: {path, fields, num_tables, num_sdt_fields, text_len}, or {error}
     """
-    tools = SessionAwareDocxTools(
-        session_id=run_context.session_id,
-        user_id=run_context.user_id
-    )
+    tools = _get_tools(run_context.session_id, run_context.user_id)
     data = tools.extract_all_data(source_filename)
+    _bump_generation(run_context.session_id)
+
+    # Failed unpack/extraction: report it instead of a summary of empty results
+    if 'error' in data:
+        return _to_json({'error': data['error']})
+
+    return _to_json({
+        'path': 'extraction_results.json',
+        'fields': list(data['extracted_values']),
+        'num_tables': len(data['tables']),
+        'num_sdt_fields': len(data['sdt_fields']),
+        'text_len': len(data['text']),
+    })
 
-    # Return as JSON string for agent processing
-    return json.dumps(data, indent=2, default=str)
+
+def read_extracted_fields(run_context: RunContext, keys: Optional[List[str]] = None) -> str:
+    """Phase 2: Look up extracted values saved by extract_all_data().
+
+    Args:
+        keys: Field names to return, e.g. ["CLIENT_NAME", "DATE"]
+              (omit to get every extracted value)
+
+    Returns:
+        JSON string mapping field names to extracted values
+    """
+    tools = _get_tools(run_context.session_id, run_context.user_id)
+    return _to_json(tools.read_extracted_fields(keys))
 
 
 def fill_fields(run_context: RunContext, field_mapping: dict) -> str:
@@ -141,14 +256,11 @@ def fill_fields(run_context: RunContext, field_mapping: dict) -> str:
     Returns:
         JSON string with fill results and validation status
     """
-    tools = SessionAwareDocxTools(
-        session_id=run_context.session_id,
-        user_id=run_context.user_id
-    )
+    tools = _get_tools(run_context.session_id, run_context.user_id)
     result = tools.fill_fields(field_mapping)
 
     # Result is always a dict from new implementation, convert to JSON string for agent
-    return json.dumps(result, indent=2, default=str)
+    return _to_json(result)
 
 
 def insert_placeholders(run_context: RunContext, field_analysis: dict) -> str:
@@ -173,21 +285,19 @@ def insert_placeholders(run_context: RunContext, field_analysis: dict) -> str:
     Returns:
         JSON string with insertion results
     """
-    tools = SessionAwareDocxTools(
-        session_id=run_context.session_id,
-        user_id=run_context.user_id
-    )
+    tools = _get_tools(run_context.session_id, run_context.user_id)
     result = tools.insert_placeholders(field_analysis)
-    return json.dumps(result, indent=2, default=str)
+    return _to_json(result)
 
 
 def cleanup(run_context: RunContext) -> str:
     """Clean up the session workspace."""
-    tools = SessionAwareDocxTools(
-        session_id=run_context.session_id,
-        user_id=run_context.user_id
-    )
-    return tools.cleanup()
+    tools = _get_tools(run_context.session_id, run_context.user_id)
+    result = tools.cleanup()
+    _bump_generation(run_context.session_id)
+    # Drop this session's tool instance so its removed workspace is not kept alive
+    _drop_tools(run_context.session_id, run_context.user_id)
+    return result
 
 
 def read_lib_file(run_context: RunContext, filename: str) -> str:
@@ -204,10 +314,7 @@ def read_lib_file(run_context: RunContext, filename: str) -> str:
     Returns:
         File contents as string
     """
-    tools = SessionAwareDocxTools(
-        session_id=run_context.session_id,
-        user_id=run_context.user_id
-    )
+    tools = _get_tools(run_context.session_id, run_context.user_id)
     return tools.read_lib_file(filename)
 
 
@@ -225,8 +332,5 @@ def save_debug_file(run_context: RunContext, filename: str, content: str) -> str
     Returns:
         Path where file was saved
     """
-    tools = SessionAwareDocxTools(
-        session_id=run_context.session_id,
-        user_id=run_context.user_id
-    )
+    tools = _get_tools(run_context.session_id, run_context.user_id)
     return tools.save_debug_file(filename, content)
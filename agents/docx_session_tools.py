@@ -2,11 +2,81 @@
 DOCX Session-Aware Tools - Layer 3
 SessionAwareDocxTools class that wraps core tools and applies workspace isolation
 """
+import heapq
+import json
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterator, List, Tuple
 from .session_workspace import SessionWorkspaceManager
 from . import docx_tools  # Import Layer 1 core tools
 
+# Most file names shown by list_input_files()/list_output_files()
+_LIST_LIMIT = 200
+
+# Output headers shared by the listing/info tools
+_HDR_IN = "📁 **Files in session input directory:**"
+_HDR_OUT = "📁 **Files in session output directory:**"
+_HDR_INFO_TEMPLATE = (
+    "📋 **Session Information:**\n"
+    "  - Session ID: {sid}\n"
+    "  - Input directory: {session_dir}/input\n"
+    "  - Output directory: {session_dir}/output\n"
+    "  - Debug directory: {session_dir}/debug\n"
+    "  - Input files: {n_in} file(s)\n"
+    "  - Output files: {n_out} file(s)"
+)
+
+# Seconds to coalesce last-accessed updates before touching the session dir
+_ACCESS_FLUSH_DELAY = 2.0
+
+# Project lib/ directory served by read_lib_file()
+_LIB_BASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib')
+# Largest lib/ file read_lib_file() will load
+_MAX_LIB_BYTES = 5 * 1024 * 1024
+
+# One SessionWorkspaceManager per workspace base, shared by every session
+_WORKSPACE_MGRS: Dict[str, SessionWorkspaceManager] = {}
+_WORKSPACE_MGRS_LOCK = threading.Lock()
+
+
+def _get_workspace_manager(workspace_base: str) -> SessionWorkspaceManager:
+    """Return the shared workspace manager for workspace_base, creating it once."""
+    manager = _WORKSPACE_MGRS.get(workspace_base)
+    if manager is None:
+        with _WORKSPACE_MGRS_LOCK:
+            manager = _WORKSPACE_MGRS.get(workspace_base)
+            if manager is None:
+                manager = SessionWorkspaceManager(base_workspace_dir=workspace_base)
+                _WORKSPACE_MGRS[workspace_base] = manager
+    return manager
+
+
+def _first_subdir(path: Path) -> Optional[Path]:
+    """Return the first subdirectory of path (scandir's cached d_type, no per-entry stat)."""
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                return Path(entry.path)
+    return None
+
+
+@lru_cache(maxsize=64)
+def _read_lib_text(lib_path: str, mtime_ns: int, size: int) -> str:
+    """Read a lib/ file once per (path, mtime, size); shared by all sessions."""
+    # One binary read and one-shot decode instead of text-mode incremental decoding
+    with open(lib_path, 'rb') as f:
+        data = f.read(_MAX_LIB_BYTES)
+    return data.decode('utf-8').replace('\r\n', '\n')
+
+
+def invalidate_lib_cache() -> None:
+    """Forget cached lib/ file contents (e.g. after editing docs during development)."""
+    _read_lib_text.cache_clear()
+
 
 class SessionAwareDocxTools:
     """
@@ -18,122 +88,236 @@ class SessionAwareDocxTools:
         """Initialize session-aware tools."""
         self.session_id = session_id
         self.user_id = user_id
-        self.workspace = SessionWorkspaceManager(base_workspace_dir=workspace_base)
+        self.workspace = _get_workspace_manager(workspace_base)
+        # Bound once: every tool call goes through these
+        self._get_session_dir = self.workspace.get_session_dir
+        self._get_input_dir = self.workspace.get_input_dir
+        self._get_unpacked_dir = self.workspace.get_unpacked_dir
+        self._get_sources_dir = self.workspace.get_sources_dir
+        self._get_debug_dir = self.workspace.get_debug_dir
+        self._get_output_dir = self.workspace.get_output_dir
+        self._touch = self.workspace.update_last_accessed
+        # (filename, output_filename) -> (mtime_ns, size, result) of the last conversion
+        self._markdown_cache: Dict[Tuple[str, str], Tuple[int, int, str]] = {}
+        # Template directory left by unpack_template(), so later phases skip the scan
+        self._unpacked_subdir: Optional[Path] = None
+        # input filename -> (mtime_ns, size, unpacked dir), so a DOCX is extracted only once
+        self._unpacked_sources: Dict[str, Tuple[int, int, Path]] = {}
+        # directory -> (st_mtime_ns, first _LIST_LIMIT names sorted, total count) of its last listing
+        self._dir_cache: Dict[Path, Tuple[int, List[str], int]] = {}
+        # Pending last-accessed update, written by flush() on a short debounce
+        self._access_dirty = False
+        self._last_access_ts = 0.0
+        self._access_timer: Optional[threading.Timer] = None
+        self._access_lock = threading.Lock()
+        # Set once save_debug_file() has ensured debug/ exists
+        self._debug_dir_made = False
+
+    def _mark_accessed(self) -> None:
+        """Record a tool call; the session dir is touched once per debounce window."""
+        with self._access_lock:
+            self._access_dirty = True
+            self._last_access_ts = time.time()
+            if self._access_timer is None:
+                self._access_timer = threading.Timer(_ACCESS_FLUSH_DELAY, self.flush)
+                self._access_timer.daemon = True
+                self._access_timer.start()
+
+    def flush(self) -> None:
+        """Write any pending last-accessed update (safe to call at end of a request)."""
+        with self._access_lock:
+            if self._access_timer is not None:
+                self._access_timer.cancel()
+                self._access_timer = None
+            if not self._access_dirty:
+                return
+            self._access_dirty = False
+        self._touch(self.session_id)
+
+    def _cached_list(self, dir_path: Path,
+                     iterate: Callable[[str], Iterator[str]]) -> Tuple[List[str], int]:
+        """First _LIST_LIMIT names of dir_path (sorted) and the total count.
+
+        Re-lists only when the directory's mtime changes; heapq.nsmallest keeps
+        memory bounded by _LIST_LIMIT instead of sorting every name.
+        """
+        mtime_ns = os.stat(dir_path).st_mtime_ns
+        cached = self._dir_cache.get(dir_path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1], cached[2]
+
+        total = 0
+
+        def counted() -> Iterator[str]:
+            nonlocal total
+            for name in iterate(self.session_id):
+                total += 1
+                yield name
+
+        files = heapq.nsmallest(_LIST_LIMIT, counted())
+        self._dir_cache[dir_path] = (mtime_ns, files, total)
+        return files, total
+
+    def _file_count(self, dir_path: Path, subdir: str) -> int:
+        """Number of files in dir_path, from the listing cache when it is still fresh."""
+        cached = self._dir_cache.get(dir_path)
+        if cached is not None and cached[0] == os.stat(dir_path).st_mtime_ns:
+            return cached[2]
+        return self.workspace.count_files(self.session_id, subdir)
+
+    def _input_files(self) -> Tuple[List[str], int]:
+        return self._cached_list(self._get_input_dir(self.session_id),
+                                 self.workspace.iter_input_files)
+
+    def _output_files(self) -> Tuple[List[str], int]:
+        return self._cached_list(self._get_output_dir(self.session_id),
+                                 self.workspace.iter_output_files)
+
+    def _get_unpacked_subdir(self) -> Optional[Path]:
+        """Return the unpacked template directory, scanning unpacked/ only on a cache miss."""
+        if self._unpacked_subdir is not None and self._unpacked_subdir.is_dir():
+            return self._unpacked_subdir
+        self._unpacked_subdir = _first_subdir(self._get_unpacked_dir(self.session_id))
+        return self._unpacked_subdir
+
+    def _unpack_cache_dir(self) -> str:
+        """Per-session unpack cache; lives in the session dir so cleanup() removes it."""
+        return str(self._get_session_dir(self.session_id) / ".cache" / "unpack")
+
+    def _record_unpack(self, filename: str, docx_path: str, unpacked_path: Path) -> None:
+        """Remember where filename was unpacked, keyed on its current mtime/size."""
+        st = os.stat(docx_path)
+        self._unpacked_sources[filename] = (st.st_mtime_ns, st.st_size, unpacked_path)
+
+    def _lookup_unpack(self, filename: str, docx_path: str) -> Optional[Path]:
+        """Return the existing unpack of filename if the DOCX is unchanged since."""
+        cached = self._unpacked_sources.get(filename)
+        if cached is None:
+            return None
+        st = os.stat(docx_path)
+        if cached[:2] == (st.st_mtime_ns, st.st_size) and os.path.isdir(cached[2]):
+            return cached[2]
+        return None
 
     def list_input_files(self) -> str:
         """List all files in session's input directory."""
-        files = self.workspace.list_input_files(self.session_id)
+        files, total = self._input_files()
         if not files:
             return "📁 No files uploaded to this session yet."
 
-        lines = ["📁 **Files in session input directory:**"]
-        for f in sorted(files):
-            lines.append(f"  - {f}")
-
-        self.workspace.update_last_accessed(self.session_id)
-        return "\n".join(lines)
+        body = "\n".join(f"  - {f}" for f in files)
+        if total > len(files):
+            body += f"\n  ... ({total - len(files)} more)"
+        self._mark_accessed()
+        return f"{_HDR_IN}\n{body}"
 
     def list_output_files(self) -> str:
         """List all files in session's output directory."""
-        files = self.workspace.list_output_files(self.session_id)
+        files, total = self._output_files()
         if not files:
             return "📁 No output files generated yet."
 
-        lines = ["📁 **Files in session output directory:**"]
-        for f in sorted(files):
-            lines.append(f"  - {f}")
-
-        self.workspace.update_last_accessed(self.session_id)
-        return "\n".join(lines)
+        body = "\n".join(f"  - {f}" for f in files)
+        if total > len(files):
+            body += f"\n  ... ({total - len(files)} more)"
+        self._mark_accessed()
+        return f"{_HDR_OUT}\n{body}"
 
     def get_session_info(self) -> str:
         """Get session workspace information."""
-        info = self.workspace.get_session_info(self.session_id)
-        lines = [
-            "📋 **Session Information:**",
-            f"  - Session ID: {info['session_id']}",
-            f"  - Input directory: {info['session_dir']}/input",
-            f"  - Output directory: {info['session_dir']}/output",
-            f"  - Debug directory: {info['session_dir']}/debug",
-            f"  - Input files: {len(info['input_files'])} file(s)",
-            f"  - Output files: {len(info['output_files'])} file(s)"
-        ]
-        self.workspace.update_last_accessed(self.session_id)
-        return "\n".join(lines)
+        session_dir = self._get_session_dir(self.session_id)
+        self._mark_accessed()
+        return _HDR_INFO_TEMPLATE.format(
+            sid=self.session_id,
+            session_dir=session_dir,
+            n_in=self._file_count(self._get_input_dir(self.session_id), "input"),
+            n_out=self._file_count(self._get_output_dir(self.session_id), "output"),
+        )
 
     def unpack_template(self, filename: str) -> str:
         """AUTOMATION: Unpack DOCX template to XML."""
-        input_dir = self.workspace.get_input_dir(self.session_id)
-        unpacked_dir = self.workspace.get_unpacked_dir(self.session_id)
+        input_dir = self._get_input_dir(self.session_id)
+        unpacked_dir = self._get_unpacked_dir(self.session_id)
 
-        docx_path = input_dir / filename
-        if not docx_path.exists():
+        docx_path = os.path.join(input_dir, filename)
+        if not os.path.exists(docx_path):
             return f"❌ File not found: {filename}\n\nUse list_input_files() to see available files."
 
         output_subdir = unpacked_dir / Path(filename).stem
 
-        result = docx_tools.unpack_docx(str(docx_path), str(output_subdir))
-        self.workspace.update_last_accessed(self.session_id)
+        result = docx_tools.unpack_docx(docx_path, str(output_subdir), self._unpack_cache_dir())
+        if "✅" in result:
+            self._unpacked_subdir = output_subdir
+            self._record_unpack(filename, docx_path, output_subdir)
+        self._mark_accessed()
         return result
 
     def convert_docx_to_markdown(self, filename: str, output_filename: str = None) -> str:
         """AUTOMATION: Convert source DOCX to markdown for agent analysis."""
-        input_dir = self.workspace.get_input_dir(self.session_id)
-        debug_dir = self.workspace.get_debug_dir(self.session_id)
+        input_dir = self._get_input_dir(self.session_id)
+        debug_dir = self._get_debug_dir(self.session_id)
 
-        docx_path = input_dir / filename
-        if not docx_path.exists():
+        docx_path = os.path.join(input_dir, filename)
+        try:
+            st = os.stat(docx_path)
+        except FileNotFoundError:
             return f"❌ File not found: {filename}"
 
         if not output_filename:
-            output_filename = Path(filename).stem + ".md"
+            output_filename = os.path.splitext(os.path.basename(filename))[0] + ".md"
 
-        md_path = debug_dir / output_filename
+        md_path = os.path.join(debug_dir, output_filename)
 
-        result = docx_tools.convert_docx_to_markdown(str(docx_path), str(md_path))
-        self.workspace.update_last_accessed(self.session_id)
+        # Skip pandoc when the source DOCX is unchanged and its markdown still exists
+        key = (filename, output_filename)
+        cached = self._markdown_cache.get(key)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size) and os.path.exists(md_path):
+            self._mark_accessed()
+            return cached[2]
+
+        result = docx_tools.convert_docx_to_markdown(docx_path, md_path)
+        if "✅" in result:
+            self._markdown_cache[key] = (st.st_mtime_ns, st.st_size, result)
+        self._mark_accessed()
         return result
 
     def pack_template(self, output_filename: str = None) -> str:
         """AUTOMATION: Pack filled template back to DOCX."""
-        unpacked_dir = self.workspace.get_unpacked_dir(self.session_id)
-        output_dir = self.workspace.get_output_dir(self.session_id)
+        output_dir = self._get_output_dir(self.session_id)
 
         # Find unpacked directory
-        subdirs = [d for d in unpacked_dir.iterdir() if d.is_dir()]
-        if not subdirs:
+        target_dir = self._get_unpacked_subdir()
+        if target_dir is None:
             return "❌ No unpacked templates found."
 
-        target_dir = subdirs[0]
-
         if not output_filename:
             output_filename = f"{target_dir.name}_filled.docx"
 
         output_path = output_dir / output_filename
 
-        result = docx_tools.pack_docx(str(target_dir), str(output_path))
-        self.workspace.update_last_accessed(self.session_id)
+        ok, message = docx_tools.pack_docx(str(target_dir), str(output_path))
+        self._mark_accessed()
 
-        if "✅" in result:
-            return f"{result}\n\n📥 **Download your filled document from:**\n  `workspaces/{self.session_id}/output/{output_filename}`"
-        return result
+        if ok:
+            return f"{message}\n\n📥 **Download your filled document from:**\n  `workspaces/{self.session_id}/output/{output_filename}`"
+        return message
 
     def read_json_file(self, filename: str) -> str:
         """Read a JSON file from debug directory."""
-        debug_dir = self.workspace.get_debug_dir(self.session_id)
+        debug_dir = self._get_debug_dir(self.session_id)
         file_path = debug_dir / filename
 
         result = docx_tools.read_json_file(str(file_path))
-        self.workspace.update_last_accessed(self.session_id)
+        self._mark_accessed()
         return result
 
     def read_text_file(self, filename: str) -> str:
         """Read a text file from debug directory."""
-        debug_dir = self.workspace.get_debug_dir(self.session_id)
+        debug_dir = self._get_debug_dir(self.session_id)
         file_path = debug_dir / filename
 
         result = docx_tools.read_text_file(str(file_path))
-        self.workspace.update_last_accessed(self.session_id)
+        self._mark_accessed()
         return result
 
     def extract_all_data(self, source_filename: str) -> Dict[str, Any]:
@@ -151,12 +335,11 @@ class SessionAwareDocxTools:
         Returns:
             Dict with extracted data: {text, tables, sdt_fields, extracted_values}
         """
-        input_dir = self.workspace.get_input_dir(self.session_id)
-        unpacked_dir = self.workspace.get_unpacked_dir(self.session_id)
-        debug_dir = self.workspace.get_debug_dir(self.session_id)
+        input_dir = self._get_input_dir(self.session_id)
+        debug_dir = self._get_debug_dir(self.session_id)
 
-        source_path = input_dir / source_filename
-        if not source_path.exists():
+        source_path = os.path.join(input_dir, source_filename)
+        if not os.path.exists(source_path):
             return {
                 'error': f'File not found: {source_filename}',
                 'text': '',
@@ -165,17 +348,52 @@ class SessionAwareDocxTools:
                 'extracted_values': {}
             }
 
-        # Unpack source if needed
-        source_unpacked = unpacked_dir / 'source'
-        if not source_unpacked.exists():
-            docx_tools.unpack_docx(str(source_path), str(source_unpacked))
+        # Reuse an earlier unpack of this file (e.g. by unpack_template), else unpack once.
+        # Sources go under sources/, never unpacked/, so they can't be taken for the template.
+        source_unpacked = self._lookup_unpack(source_filename, source_path)
+        if source_unpacked is None:
+            source_unpacked = self._get_sources_dir(self.session_id) / Path(source_filename).stem
+            result = docx_tools.unpack_docx(source_path, str(source_unpacked), self._unpack_cache_dir())
+            if "✅" not in result:
+                self._mark_accessed()
+                return {
+                    'error': result,
+                    'text': '',
+                    'tables': [],
+                    'sdt_fields': {},
+                    'extracted_values': {}
+                }
+            self._record_unpack(source_filename, source_path, source_unpacked)
 
         # Extract using all methods and save results to debug directory
         data = docx_tools.extract_all_data(str(source_unpacked), str(debug_dir))
 
-        self.workspace.update_last_accessed(self.session_id)
+        self._mark_accessed()
         return data
 
+    def read_extracted_fields(self, keys: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Phase 2: Look up values saved by the last extract_all_data() call.
+
+        Args:
+            keys: Field names to return (all extracted values when omitted)
+
+        Returns:
+            Dict of {field_name: value} for the requested fields that exist
+        """
+        debug_dir = self._get_debug_dir(self.session_id)
+        results_path = os.path.join(debug_dir, 'extraction_results.json')
+        try:
+            with open(results_path, 'rb') as f:
+                values = json.loads(f.read()).get('extracted_values', {})
+        except FileNotFoundError:
+            return {'error': 'No extraction results found. Run extract_all_data() first.'}
+
+        self._mark_accessed()
+        if not keys:
+            return values
+        return {k: values[k] for k in keys if k in values}
+
     def fill_fields(self, field_mapping: dict) -> Dict[str, Any]:
         """
         Phase 3 & 5: Fill DOCX fields using multi-strategy approach with validation.
@@ -196,20 +414,19 @@ class SessionAwareDocxTools:
         Returns:
             Dict with fill results: {status, filled, skipped, strategies_used, validation_passed, summary}
         """
-        unpacked_dir = self.workspace.get_unpacked_dir(self.session_id)
-        debug_dir = self.workspace.get_debug_dir(self.session_id)
+        debug_dir = self._get_debug_dir(self.session_id)
 
         # Find unpacked subdirectory
-        subdirs = [d for d in unpacked_dir.iterdir() if d.is_dir()]
-        if not subdirs:
+        target_dir = self._get_unpacked_subdir()
+        if target_dir is None:
             return {
                 'status': 'failed',
                 'error': 'No unpacked templates found',
                 'summary': '❌ No unpacked templates found'
             }
 
-        result = docx_tools.fill_fields(str(subdirs[0]), field_mapping, str(debug_dir))
-        self.workspace.update_last_accessed(self.session_id)
+        result = docx_tools.fill_fields(str(target_dir), field_mapping, str(debug_dir))
+        self._mark_accessed()
         return result
 
     def insert_placeholders(self, field_analysis: Dict[str, Any]) -> Dict[str, Any]:
@@ -234,24 +451,32 @@ class SessionAwareDocxTools:
         Returns:
             Dict with insertion results: {status, inserted_count, inserted_fields, summary}
         """
-        unpacked_dir = self.workspace.get_unpacked_dir(self.session_id)
-        debug_dir = self.workspace.get_debug_dir(self.session_id)
+        debug_dir = self._get_debug_dir(self.session_id)
 
         # Find unpacked subdirectory
-        subdirs = [d for d in unpacked_dir.iterdir() if d.is_dir()]
-        if not subdirs:
+        target_dir = self._get_unpacked_subdir()
+        if target_dir is None:
             return {
                 'status': 'failed',
                 'error': 'No unpacked templates found',
                 'summary': '❌ No unpacked templates found'
             }
 
-        result = docx_tools.insert_placeholders(str(subdirs[0]), field_analysis, str(debug_dir))
-        self.workspace.update_last_accessed(self.session_id)
+        result = docx_tools.insert_placeholders(str(target_dir), field_analysis, str(debug_dir))
+        self._mark_accessed()
         return result
 
     def cleanup(self) -> str:
         """Clean up session workspace."""
+        self._unpacked_subdir = None
+        self._unpacked_sources.clear()
+        self._debug_dir_made = False
+        # Drop the pending access update so the removed session dir is not recreated
+        with self._access_lock:
+            if self._access_timer is not None:
+                self._access_timer.cancel()
+                self._access_timer = None
+            self._access_dirty = False
         if self.workspace.cleanup_session(self.session_id):
             return f"✅ Cleaned up session {self.session_id}"
         else:
@@ -266,16 +491,18 @@ class SessionAwareDocxTools:
         Returns:
             File contents or error message
         """
-        import os
-        lib_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'lib', filename)
+        lib_path = os.path.join(_LIB_BASE, filename)
 
         try:
-            if not os.path.exists(lib_path):
+            try:
+                st = os.stat(lib_path)
+            except FileNotFoundError:
                 return f"❌ File not found: lib/{filename}"
+            if st.st_size > _MAX_LIB_BYTES:
+                return f"❌ lib/{filename} is too large ({st.st_size} bytes, limit {_MAX_LIB_BYTES})"
 
-            with open(lib_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            return content
+            # An edited file gets a new cache key, so stale contents are never served
+            return _read_lib_text(lib_path, st.st_mtime_ns, st.st_size)
         except Exception as e:
             return f"❌ Error reading lib/{filename}: {e}"
 
@@ -289,17 +516,37 @@ class SessionAwareDocxTools:
         Returns:
             Path where file was saved or error message
         """
-        import os
-        debug_dir = self.workspace.get_debug_dir(self.session_id)
+        # Path arithmetic only; debug/ is created once per session, not on every save
+        debug_dir = self.workspace._path_for(self.session_id, "debug")
 
         try:
-            os.makedirs(debug_dir, exist_ok=True)
+            if not self._debug_dir_made:
+                self.workspace.ensure(debug_dir)
+                self._debug_dir_made = True
             filepath = os.path.join(debug_dir, filename)
 
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-
-            self.workspace.update_last_accessed(self.session_id)
+            # Write to a unique temp file and rename, so a killed process never leaves
+            # half a file and concurrent saves of one name never share a temp file
+            def open_temp():
+                return tempfile.NamedTemporaryFile(
+                    'w', encoding='utf-8', dir=os.path.dirname(filepath),
+                    prefix=f".{os.path.basename(filepath)}.", suffix='.tmp', delete=False)
+            try:
+                f = open_temp()
+            except FileNotFoundError:
+                # debug/ was removed behind this instance's back: recreate it once more
+                self.workspace.ensure(debug_dir)
+                f = open_temp()
+            try:
+                with f:
+                    f.write(content)
+                os.replace(f.name, filepath)
+            except BaseException:
+                if os.path.exists(f.name):
+                    os.remove(f.name)
+                raise
+
+            self._mark_accessed()
             return f"✅ Saved: {filepath}"
         except Exception as e:
             return f"❌ Error saving {filename}: {e}"
@@ -7,11 +7,31 @@ Enhanced with Phase 2-5 capabilities:
 - Phase 3: Multi-strategy filling (6 strategies)
 - Phase 5: Validation (3 tiers)
 """
+import asyncio
+import bisect
+import hashlib
+import heapq
+import json
+import shutil
 import subprocess
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+
+from lxml import etree
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is used otherwise
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:  # optional speedup, per-label str.find is used otherwise
+    ahocorasick = None
 
 # Import new modules for enhanced functionality
 from .extraction_module import (
@@ -23,40 +43,140 @@ from .extraction_module import (
 )
 
 from .filling_strategies import MultiStrategyFiller
+from .process_pool import get_process_pool
 
 from .validation_module import ComprehensiveValidator
 
+from lib.document import Document
+
+# Most entries list_data_files() shows
+_LIST_LIMIT = 200
+
+# Characters of a debug file returned by read_text_file()
+_TEXT_PREVIEW_CHARS = 10000
+
+# Run the scripts/ helpers in a child interpreter instead of in-process (isolation/debugging)
+_USE_SUBPROCESS = os.environ.get("DOCX_TOOLS_SUBPROCESS") == "1"
+
+# Unpacked trees kept per unpack_docx() cache_dir (oldest evicted); DOCX_TOOLS_NO_CACHE=1 disables it
+_UNPACK_CACHE_ENTRIES = 8
+
+# WordprocessingML namespace used by insert_placeholders()
+_W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+_W_NSMAP = {'w': _W_NS}
+_XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
 
 def list_data_files() -> str:
-    """List files in data/ directory."""
-    data_dir = Path("data")
-    if not data_dir.exists():
+    """List files in data/ directory (re-scanned only when the directory changes)."""
+    data_dir = os.path.abspath("data")
+    try:
+        mtime_ns = os.stat(data_dir).st_mtime_ns
+    except FileNotFoundError:
         return "❌ The data/ directory does not exist. Please create data/ directory or upload files to a session."
+    return _list_data_files(data_dir, mtime_ns)
+
 
-    files = list(data_dir.glob("*"))
+@lru_cache(maxsize=4)
+def _list_data_files(data_dir: str, mtime_ns: int) -> str:
+    """Render the data/ listing once per directory mtime (adding/removing files bumps it)."""
+    with os.scandir(data_dir) as it:
+        files = [entry for entry in it if entry.is_file()]
     if not files:
         return "📁 The data/ directory is empty."
 
+    # Only the first _LIST_LIMIT names are shown, so avoid sorting the whole directory
+    if len(files) > _LIST_LIMIT:
+        shown = heapq.nsmallest(_LIST_LIMIT, files, key=lambda entry: entry.name)
+    else:
+        shown = sorted(files, key=lambda entry: entry.name)
+
     lines = ["📁 **Available files:**"]
-    for f in sorted(files):
-        if f.is_file():
-            size = f.stat().st_size / 1024  # KB
-            lines.append(f"  - {f.name} ({size:.1f} KB)")
+    for entry in shown:
+        size = entry.stat().st_size / 1024  # KB
+        lines.append(f"  - {entry.name} ({size:.1f} KB)")
+    if len(files) > len(shown):
+        lines.append(f"  ... ({len(files) - len(shown)} more)")
 
     return "\n".join(lines)
 
 
-def unpack_docx(docx_path: str, output_dir: str) -> str:
-    """Unpack a DOCX file to XML structure."""
+def _cache_enabled() -> bool:
+    return os.environ.get("DOCX_TOOLS_NO_CACHE") != "1"
+
+
+def _hash_file(path: str) -> str:
+    """blake2b digest of a file's bytes."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_store(src: Path, dest: Path) -> None:
+    """Copy src (file or directory) into the cache at dest; a failed copy is just a miss later."""
+    tmp = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+    try:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if src.is_dir():
+            shutil.copytree(src, tmp, copy_function=shutil.copyfile)
+        else:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    except OSError:
+        if tmp.is_dir():
+            shutil.rmtree(tmp, ignore_errors=True)
+        elif tmp.exists():
+            tmp.unlink()
+
+
+def _cache_evict(cache_root: Path, keep: int) -> None:
+    """Remove all but the keep most recently used entries under cache_root."""
+    try:
+        with os.scandir(cache_root) as it:
+            entries = [(e.stat(follow_symlinks=False).st_mtime_ns, e.path) for e in it
+                       if e.is_dir(follow_symlinks=False) and not e.name.endswith(".tmp")]
+    except OSError:
+        return
+    for _, path in heapq.nsmallest(max(len(entries) - keep, 0), entries):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def unpack_docx(docx_path: str, output_dir: str, cache_dir: Optional[str] = None) -> str:
+    """Unpack a DOCX file to XML structure.
+
+    cache_dir, when given, keeps the last _UNPACK_CACHE_ENTRIES unpacked trees
+    keyed by DOCX content, so the owner can delete them along with its other data.
+    """
     script_path = Path(__file__).parent.parent / "scripts" / "unpack_docx.py"
 
     try:
-        result = subprocess.run(
-            [sys.executable, str(script_path), docx_path, output_dir],
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        # Same DOCX bytes always unpack to the same tree, so reuse an earlier unpack
+        cached = None
+        if cache_dir is not None and _cache_enabled():
+            cached = Path(cache_dir) / _hash_file(docx_path)
+            if cached.is_dir():
+                shutil.copytree(cached, output_dir, dirs_exist_ok=True, copy_function=shutil.copyfile)
+                os.utime(cached)
+                return f"✅ Successfully unpacked DOCX to {output_dir}"
+
+        if _USE_SUBPROCESS:
+            subprocess.run(
+                [sys.executable, str(script_path), docx_path, output_dir],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+        else:
+            from scripts.unpack_docx import run as _unpack_run
+            try:
+                _unpack_run(docx_path, output_dir)
+            except Exception as e:
+                return f"❌ Error unpacking DOCX: {e}"
+        if cached is not None:
+            _cache_store(Path(output_dir), cached)
+            _cache_evict(cached.parent, _UNPACK_CACHE_ENTRIES)
         return f"✅ Successfully unpacked DOCX to {output_dir}"
     except subprocess.CalledProcessError as e:
         return f"❌ Error unpacking DOCX: {e.stderr}"
@@ -69,12 +189,21 @@ def convert_docx_to_markdown(docx_path: str, output_md_path: str) -> str:
     script_path = Path(__file__).parent.parent / "scripts" / "docx_to_markdown.py"
 
     try:
-        result = subprocess.run(
-            [sys.executable, str(script_path), docx_path, output_md_path],
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        if _USE_SUBPROCESS:
+            subprocess.run(
+                [sys.executable, str(script_path), docx_path, output_md_path],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+        else:
+            from scripts.docx_to_markdown import run as _markdown_run
+            try:
+                _markdown_run(docx_path, output_md_path)
+            except FileNotFoundError:
+                return "❌ pandoc not installed. Install with: apt-get install pandoc"
+            except Exception as e:
+                return f"❌ Error converting to markdown: {e}"
         return f"✅ Successfully converted {Path(docx_path).name} to markdown"
     except subprocess.CalledProcessError as e:
         if "pandoc not found" in e.stderr:
@@ -84,40 +213,80 @@ def convert_docx_to_markdown(docx_path: str, output_md_path: str) -> str:
         return f"❌ Error: {str(e)}"
 
 
-def pack_docx(unpacked_dir: str, output_docx: str) -> str:
-    """Pack unpacked XML back to DOCX."""
+def unpack_docx_batch(pairs: List[Tuple[str, str]]) -> List[str]:
+    """Unpack several (docx_path, output_dir) pairs, in parallel when it pays off.
+
+    Returns one unpack_docx() message per pair, in order. Two or fewer pairs
+    are unpacked inline since pool start-up would outweigh the work.
+    """
+    if len(pairs) <= 2:
+        return [unpack_docx(docx_path, output_dir) for docx_path, output_dir in pairs]
+    pool = get_process_pool()
+    futures = [pool.submit(unpack_docx, docx_path, output_dir) for docx_path, output_dir in pairs]
+    return [f.result() for f in futures]
+
+
+def pack_docx(unpacked_dir: str, output_docx: str, compress: bool = True) -> Tuple[bool, str]:
+    """Pack unpacked XML back to DOCX.
+
+    compress=False writes an uncompressed (ZIP_STORED) DOCX, for intermediate
+    files such as the markdown preview that are regenerated on every call.
+
+    Returns:
+        (ok, message) - ok is True when the DOCX was written
+    """
     script_path = Path(__file__).parent.parent / "scripts" / "pack_docx.py"
 
     try:
-        result = subprocess.run(
-            [sys.executable, str(script_path), unpacked_dir, output_docx],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        return f"✅ Successfully packed to {Path(output_docx).name}"
+        if _USE_SUBPROCESS:
+            subprocess.run(
+                [sys.executable, str(script_path), unpacked_dir, output_docx]
+                + ([] if compress else ['--no-compress']),
+                capture_output=True,
+                text=True,
+                check=True
+            )
+        else:
+            from scripts.pack_docx import run as _pack_run
+            try:
+                _pack_run(unpacked_dir, output_docx, compress=compress)
+            except Exception as e:
+                return False, f"❌ Error packing DOCX: {e}"
+        return True, f"✅ Successfully packed to {Path(output_docx).name}"
     except subprocess.CalledProcessError as e:
-        return f"❌ Error packing DOCX: {e.stderr}"
+        return False, f"❌ Error packing DOCX: {e.stderr}"
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        return False, f"❌ Error: {str(e)}"
 
 
-def save_json_file(file_path: str, data: Dict[str, Any]) -> str:
-    """Save JSON data to file."""
-    import json
+def save_json_file(file_path: str, data: Dict[str, Any], compact: bool = False) -> str:
+    """Save JSON data to file (orjson when available).
+
+    compact=True skips indentation, for large machine-read debug files
+    (read_json_file() re-indents them for display).
+    """
     try:
         Path(file_path).parent.mkdir(parents=True, exist_ok=True)
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS if compact else orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            Path(file_path).write_bytes(orjson.dumps(data, option=option))
+        else:
+            with open(file_path, 'w') as f:
+                if compact:
+                    json.dump(data, f, separators=(',', ':'))
+                else:
+                    json.dump(data, f, indent=2)
         return f"✅ Saved to {file_path}"
     except Exception as e:
         return f"❌ Error saving JSON: {str(e)}"
 
 
 def read_json_file(file_path: str) -> str:
-    """Read JSON file and return as formatted string."""
-    import json
+    """Read JSON file and return as formatted string (orjson when available)."""
     try:
+        if orjson is not None:
+            data = orjson.loads(Path(file_path).read_bytes())
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8')
         with open(file_path, 'r') as f:
             data = json.load(f)
         return json.dumps(data, indent=2)
@@ -128,12 +297,15 @@ def read_json_file(file_path: str) -> str:
 
 
 def read_text_file(file_path: str) -> str:
-    """Read text file."""
+    """Read text file (at most the first _TEXT_PREVIEW_CHARS characters)."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        if len(content) > 10000:
-            return content[:10000] + f"\n\n... (truncated, total {len(content)} chars)"
+        # Only the head is returned, so read just enough bytes for it (UTF-8 is <= 4 bytes/char)
+        with open(file_path, 'rb', buffering=1 << 20) as f:
+            head = f.read(_TEXT_PREVIEW_CHARS * 4)
+            total_size = os.fstat(f.fileno()).st_size
+        content = head.decode('utf-8', errors='replace').replace('\r\n', '\n')
+        if total_size > len(head) or len(content) > _TEXT_PREVIEW_CHARS:
+            return content[:_TEXT_PREVIEW_CHARS] + f"\n\n... (truncated, total {total_size} bytes)"
         return content
     except FileNotFoundError:
         return f"❌ File not found: {file_path}"
@@ -162,6 +334,7 @@ def extract_all_data(unpacked_source: str, debug_dir: str = None) -> dict:
             'sdt_fields': {field_name: value, ...},
             'extracted_values': {field_name: value, ...}
         }
+        plus an 'error' message (and empty values) when extraction fails
     """
     print(f"[Phase 2] Extracting data from source...")
 
@@ -177,14 +350,18 @@ def extract_all_data(unpacked_source: str, debug_dir: str = None) -> dict:
 
         # Save extraction results to debug directory
         if debug_dir:
-            save_json_file(f"{debug_dir}/extraction_results.json", data)
+            save_json_file(f"{debug_dir}/extraction_results.json", data, compact=True)
             print(f"[Phase 2] Saved extraction results to debug directory")
 
         return data
 
     except Exception as e:
         print(f"[Phase 2] Error during extraction: {str(e)}")
+        # Remove the previous run's results so read_extracted_fields() can't serve them
+        if debug_dir:
+            Path(debug_dir, 'extraction_results.json').unlink(missing_ok=True)
         return {
+            'error': f'Extraction failed: {e}',
             'text': '',
             'tables': [],
             'sdt_fields': {},
@@ -192,44 +369,152 @@ def extract_all_data(unpacked_source: str, debug_dir: str = None) -> dict:
         }
 
 
-def insert_placeholders(unpacked_dir: str, field_analysis: dict, debug_dir: str = None) -> dict:
-    """
-    Phase 1.3: Insert {{FIELD_NAME}} placeholders into template.
+def _append_placeholder_run(para, text: str) -> None:
+    """Append <w:r><w:t xml:space="preserve">text</w:t></w:r> to an lxml paragraph."""
+    run = etree.SubElement(para, f'{{{_W_NS}}}r')
+    etree.SubElement(run, f'{{{_W_NS}}}t', {_XML_SPACE: 'preserve'}).text = text
 
-    Automatically inserts {{FIELD_NAME}} placeholders into the unpacked template XML
-    based on field analysis provided by the agent.
 
-    Args:
-        unpacked_dir: Path to unpacked template directory
-        field_analysis: Dict with fields to insert:
-            {
-                'fields': [
-                    {
-                        'field_name': 'PROJECT_MANAGER',
-                        'label': 'Project Manager:',
-                        'location': 'below_label'
-                    },
-                    ...
-                ]
-            }
-        debug_dir: Directory to save placeholder insertion results (optional)
+def _first_label_hits(para_texts: list, labels: set) -> Dict[str, int]:
+    """Map each label to the index of the first paragraph whose text contains it.
 
-    Returns:
-        Dict with results:
-        {
-            'status': 'success|partial|failed',
-            'inserted_count': N,
-            'inserted_fields': [...],
-            'summary': 'message'
-        }
+    All paragraphs are joined with a record separator so one scan covers the whole
+    document: a single Aho-Corasick pass over every label when pyahocorasick is
+    installed, otherwise one C-level str.find per label.
     """
+    joined = '\x1e'.join(para_texts)
+    starts = []
+    offset = 0
+    for text in para_texts:
+        starts.append(offset)
+        offset += len(text) + 1
+
+    hits = {}
+    if ahocorasick is not None and labels:
+        automaton = ahocorasick.Automaton()
+        for label in labels:
+            automaton.add_word(label, label)
+        automaton.make_automaton()
+        for end_idx, label in automaton.iter(joined):
+            if label not in hits:
+                hits[label] = bisect.bisect_right(starts, end_idx - len(label) + 1) - 1
+                if len(hits) == len(labels):
+                    break
+    else:
+        for label in labels:
+            pos = joined.find(label)
+            if pos != -1:
+                hits[label] = bisect.bisect_right(starts, pos) - 1
+    return hits
+
+
+def _insert_placeholder_runs(unpacked_dir: str, fields: list) -> Tuple[List[str], List[str]]:
+    """Append a {{FIELD_NAME}} run per field to word/document.xml; returns (inserted, failed)."""
+    # Load template body with lxml (libxml2) - itertext() replaces per-paragraph toxml()
+    document_xml = Path(unpacked_dir) / "word" / "document.xml"
+    parser = etree.XMLParser(remove_blank_text=False, huge_tree=True, resolve_entities=False)
+    tree = etree.parse(str(document_xml), parser)
+    dom = tree.getroot()
+    paragraphs = dom.findall('.//w:p', namespaces=_W_NSMAP)
+    # Paragraph texts computed once; only a paragraph we append to is recomputed
+    para_texts = [''.join(para.itertext()) for para in paragraphs]
+
+    inserted_fields = []
+    failed_fields = []
+
+    # First paragraph containing each label, found in one pass over the document
+    labels = {f.get('label') for f in fields if f.get('field_name') and f.get('label')}
+    label_hits = _first_label_hits(para_texts, labels)
+
+    def appended_to(i: int) -> None:
+        """Refresh paragraph i after an append; it may now be a label's first hit."""
+        para_texts[i] = ''.join(paragraphs[i].itertext())
+        for lbl in labels:
+            hit = label_hits.get(lbl)
+            if (hit is None or hit > i) and lbl in para_texts[i]:
+                label_hits[lbl] = i
+
+    # Process each field. Kept serial: the label scan above is the only costly part,
+    # each append is a couple of SubElement calls, lxml trees are not safe to mutate
+    # from several threads, and appended_to() lets later fields see earlier appends
+    for field_info in fields:
+        field_name = field_info.get('field_name')
+        label = field_info.get('label', '')
+        location = field_info.get('location', 'below_label')
+
+        if not field_name:
+            continue
+
+        try:
+            hit = label_hits.get(label) if label else None
+            inserted = hit is not None
+
+            if inserted:
+                # Strategy: below the label when asked and possible,
+                # otherwise inline on the same line as the label
+                if location == 'below_label' and hit + 1 < len(paragraphs):
+                    target, text = hit + 1, f"{{{{{field_name}}}}}"
+                else:
+                    target, text = hit, f" {{{{{field_name}}}}}"
+                _append_placeholder_run(paragraphs[target], text)
+                appended_to(target)
+
+            if inserted:
+                inserted_fields.append(field_name)
+            else:
+                failed_fields.append(field_name)
+
+        except Exception as e:
+            print(f"[Phase 1.3] Error inserting {field_name}: {str(e)}")
+            failed_fields.append(field_name)
+
+    # Save document (without validation - we didn't break anything, just added placeholders)
+    tree.write(
+        str(document_xml),
+        xml_declaration=True,
+        encoding=tree.docinfo.encoding or 'UTF-8',
+        standalone=True if tree.docinfo.standalone else None,
+    )
+
+    return inserted_fields, failed_fields
+
+
+async def _pack_and_convert_async(unpacked_dir: str, debug_dir: str) -> Optional[str]:
+    """Pack the template into debug_dir and render it to markdown; returns the .md path or None."""
+    print(f"[Phase 1.3] Generating markdown preview of template with placeholders...")
     try:
-        from lib.document import Document
+        # Pack the unpacked directory to temporary DOCX
+        temp_docx_path = f"{debug_dir}/template_with_placeholders.docx"
+        packed, pack_result = await asyncio.to_thread(
+            pack_docx, unpacked_dir, temp_docx_path, False
+        )
 
-        print(f"[Phase 1.3] Inserting placeholders into template...")
+        if not packed:
+            print(f"[Phase 1.3] Warning: Could not repack DOCX for markdown generation: {pack_result}")
+            return None
 
-        # Load template
-        doc = Document(unpacked_dir)
+        # Convert the repacked DOCX to markdown
+        markdown_path = f"{debug_dir}/template_with_placeholders.md"
+        markdown_result = await asyncio.to_thread(convert_docx_to_markdown, temp_docx_path, markdown_path)
+
+        if "Successfully converted" in markdown_result:
+            print(f"[Phase 1.3] Saved markdown preview to {markdown_path}")
+            return markdown_path
+        print(f"[Phase 1.3] Warning: Could not convert to markdown: {markdown_result}")
+    except Exception as e:
+        print(f"[Phase 1.3] Warning: Could not generate markdown preview: {str(e)}")
+    return None
+
+
+async def insert_placeholders_async(unpacked_dir: str, field_analysis: dict, debug_dir: str = None) -> dict:
+    """
+    Async form of insert_placeholders(); same arguments and result.
+
+    The XML edit runs in a worker thread, then the two debug JSON dumps and the
+    pack -> markdown preview run concurrently (they touch disjoint files).
+    """
+    try:
+        print(f"[Phase 1.3] Inserting placeholders into template...")
 
         # Get fields to insert
         fields = field_analysis.get('fields', [])
@@ -241,82 +526,9 @@ def insert_placeholders(unpacked_dir: str, field_analysis: dict, debug_dir: str
                 'summary': '❌ No fields provided for placeholder insertion'
             }
 
-        inserted_fields = []
-        failed_fields = []
-
-        # Process each field
-        for field_info in fields:
-            field_name = field_info.get('field_name')
-            label = field_info.get('label', '')
-            location = field_info.get('location', 'below_label')
-
-            if not field_name:
-                continue
-
-            try:
-                # Load XML
-                doc_xml = doc["word/document.xml"]
-                dom = doc_xml.dom
-                paragraphs = dom.getElementsByTagName('w:p')
-
-                inserted = False
-
-                # Strategy: Find label and insert placeholder below it
-                if location == 'below_label' and label:
-                    for i, para in enumerate(paragraphs):
-                        para_text = para.toxml() if hasattr(para, 'toxml') else str(para)
-
-                        # Check if paragraph contains the label
-                        if label in para_text:
-                            # Insert placeholder in next paragraph
-                            if i + 1 < len(paragraphs):
-                                next_para = paragraphs[i + 1]
-
-                                # Create placeholder text element
-                                placeholder_run = dom.createElement('w:r')
-                                placeholder_text = dom.createElement('w:t')
-                                placeholder_text.setAttribute('xml:space', 'preserve')
-                                placeholder_text.appendChild(
-                                    dom.createTextNode(f"{{{{{field_name}}}}}")
-                                )
-                                placeholder_run.appendChild(placeholder_text)
-
-                                # Append to next paragraph
-                                next_para.appendChild(placeholder_run)
-                                inserted = True
-                                break
-
-                # Strategy: Insert as inline placeholder on same line as label
-                if not inserted and label:
-                    for para in paragraphs:
-                        para_xml = para.toxml() if hasattr(para, 'toxml') else str(para)
-
-                        if label in para_xml:
-                            # Create placeholder text element
-                            placeholder_run = dom.createElement('w:r')
-                            placeholder_text = dom.createElement('w:t')
-                            placeholder_text.setAttribute('xml:space', 'preserve')
-                            placeholder_text.appendChild(
-                                dom.createTextNode(f" {{{{{field_name}}}}}")
-                            )
-                            placeholder_run.appendChild(placeholder_text)
-
-                            # Append to label paragraph
-                            para.appendChild(placeholder_run)
-                            inserted = True
-                            break
-
-                if inserted:
-                    inserted_fields.append(field_name)
-                else:
-                    failed_fields.append(field_name)
-
-            except Exception as e:
-                print(f"[Phase 1.3] Error inserting {field_name}: {str(e)}")
-                failed_fields.append(field_name)
-
-        # Save document (without validation - we didn't break anything, just added placeholders)
-        doc.save(validate=False)
+        inserted_fields, failed_fields = await asyncio.to_thread(
+            _insert_placeholder_runs, unpacked_dir, fields
+        )
 
         # Determine status
         status = 'success' if len(failed_fields) == 0 else 'partial' if len(inserted_fields) > 0 else 'failed'
@@ -335,33 +547,16 @@ def insert_placeholders(unpacked_dir: str, field_analysis: dict, debug_dir: str
             'summary': f"✅ {result_msg}" if status == 'success' else f"⚠️ {result_msg}"
         }
 
-        # Save placeholder insertion results to debug directory
+        # Save placeholder insertion results and the markdown preview to debug directory
         if debug_dir:
-            save_json_file(f"{debug_dir}/placeholder_insertion_results.json", results)
-            save_json_file(f"{debug_dir}/field_analysis_used.json", field_analysis)
+            _, _, markdown_path = await asyncio.gather(
+                asyncio.to_thread(save_json_file, f"{debug_dir}/placeholder_insertion_results.json", dict(results)),
+                asyncio.to_thread(save_json_file, f"{debug_dir}/field_analysis_used.json", field_analysis, True),
+                _pack_and_convert_async(unpacked_dir, debug_dir),
+            )
             print(f"[Phase 1.3] Saved placeholder insertion results to debug directory")
-
-            # Generate markdown from the modified template
-            print(f"[Phase 1.3] Generating markdown preview of template with placeholders...")
-            try:
-                # Pack the unpacked directory to temporary DOCX
-                temp_docx_path = f"{debug_dir}/template_with_placeholders.docx"
-                pack_result = pack_docx(unpacked_dir, temp_docx_path)
-
-                if "Successfully packed" in pack_result:
-                    # Convert the repacked DOCX to markdown
-                    markdown_path = f"{debug_dir}/template_with_placeholders.md"
-                    markdown_result = convert_docx_to_markdown(temp_docx_path, markdown_path)
-
-                    if "Successfully converted" in markdown_result:
-                        print(f"[Phase 1.3] Saved markdown preview to {markdown_path}")
-                        results['markdown_preview'] = markdown_path
-                    else:
-                        print(f"[Phase 1.3] Warning: Could not convert to markdown: {markdown_result}")
-                else:
-                    print(f"[Phase 1.3] Warning: Could not repack DOCX for markdown generation: {pack_result}")
-            except Exception as e:
-                print(f"[Phase 1.3] Warning: Could not generate markdown preview: {str(e)}")
+            if markdown_path:
+                results['markdown_preview'] = markdown_path
 
         return results
 
@@ -376,6 +571,50 @@ def insert_placeholders(unpacked_dir: str, field_analysis: dict, debug_dir: str
         }
 
 
+def _run_sync(coro):
+    """asyncio.run(coro), from a helper thread if this thread already runs an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+def insert_placeholders(unpacked_dir: str, field_analysis: dict, debug_dir: str = None) -> dict:
+    """
+    Phase 1.3: Insert {{FIELD_NAME}} placeholders into template.
+
+    Automatically inserts {{FIELD_NAME}} placeholders into the unpacked template XML
+    based on field analysis provided by the agent.
+
+    Args:
+        unpacked_dir: Path to unpacked template directory
+        field_analysis: Dict with fields to insert:
+            {
+                'fields': [
+                    {
+                        'field_name': 'PROJECT_MANAGER',
+                        'label': 'Project Manager:',
+                        'location': 'below_label'
+                    },
+                    ...
+                ]
+            }
+        debug_dir: Directory to save placeholder insertion results (optional)
+
+    Returns:
+        Dict with results:
+        {
+            'status': 'success|partial|failed',
+            'inserted_count': N,
+            'inserted_fields': [...],
+            'summary': 'message'
+        }
+    """
+    return _run_sync(insert_placeholders_async(unpacked_dir, field_analysis, debug_dir))
+
+
 def fill_fields(unpacked_dir: str, field_mapping: dict, debug_dir: str = None) -> dict:
     """
     Phase 3 & 5: Fill DOCX fields using multiple strategies with automatic validation.
@@ -411,8 +650,6 @@ def fill_fields(unpacked_dir: str, field_mapping: dict, debug_dir: str = None) -
         }
     """
     try:
-        from lib.document import Document
-
         print(f"[Phase 3] Filling template with {len(field_mapping)} fields...")
 
         # Load template
@@ -420,18 +657,19 @@ def fill_fields(unpacked_dir: str, field_mapping: dict, debug_dir: str = None) -
 
         # Use multi-strategy filler
         filler = MultiStrategyFiller(doc)
-        strategy_results = filler.fill_with_all_strategies(field_mapping)
+        strategy_results = filler.fill_with_all_strategies(field_mapping, save=False)
 
-        # Compile results
-        all_filled = []
+        # Compile results (dict keys: deduplicated, in the order strategies filled them)
+        all_filled: Dict[str, None] = {}
         all_skipped = 0
 
         for strategy_name, result in strategy_results.items():
-            all_filled.extend(result.filled)
+            all_filled.update(dict.fromkeys(result.filled))
             all_skipped += len(result.skipped)
 
-        # Save document (skip validation - pre-existing errors in template shouldn't block field filling)
-        doc.save(validate=False)
+        # Save document once, if anything was filled (validation is skipped -
+        # pre-existing errors in template shouldn't block field filling)
+        filler.commit()
 
         # Validate results
         print(f"[Phase 5] Validating document...")
@@ -440,7 +678,7 @@ def fill_fields(unpacked_dir: str, field_mapping: dict, debug_dir: str = None) -
         is_valid = validator.validate_all(expected_fields)
 
         # Build response
-        filled_list = list(set(all_filled))  # Remove duplicates
+        filled_list = list(all_filled)
         status = "success" if is_valid else "partial"
 
         result_msg = f"Filled {len(filled_list)}"
@@ -459,13 +697,13 @@ def fill_fields(unpacked_dir: str, field_mapping: dict, debug_dir: str = None) -
         }
 
         # Create filled mapping (only fields that were actually filled)
-        filled_mapping = {k: v for k, v in field_mapping.items() if k in filled_list}
+        filled_mapping = {k: v for k, v in field_mapping.items() if k in all_filled}
 
         # Save filling results to debug directory
         if debug_dir:
             save_json_file(f"{debug_dir}/filling_results.json", results)
-            save_json_file(f"{debug_dir}/field_mapping_applied.json", field_mapping)
-            save_json_file(f"{debug_dir}/field_mapping_filled.json", filled_mapping)
+            save_json_file(f"{debug_dir}/field_mapping_applied.json", field_mapping, compact=True)
+            save_json_file(f"{debug_dir}/field_mapping_filled.json", filled_mapping, compact=True)
             print(f"[Phase 3] Saved filling results to debug directory")
 
         return results
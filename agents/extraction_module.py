@@ -4,11 +4,53 @@ Data Extraction Module - Phase 2 Implementation
 Extracts data from DOCX using 3 methods: Text, Tables, and SDT fields
 """
 
+import logging
 import os
+import re
+import zipfile
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Any
-from xml.dom import minidom
-from defusedxml import minidom as defused_minidom
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+try:
+    import re2
+except ImportError:  # optional linear-time engine, stdlib re is used otherwise
+    re2 = None
+
+# Compiler for the field heuristics; patterns use inline flags so both engines accept them
+_compile = re2.compile if re2 is not None else re.compile
+
+# WordprocessingML namespace in lxml's Clark notation
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_NS = {'w': W[1:-1]}
+
+# Precompiled XPath for the DOM extractors. Descendant axes throughout, so nested
+# tables' rows/cells/text still count towards every enclosing table/row/cell;
+# text() yields the strings directly (plain str, no parent back-references)
+_XP_ROWS = etree.XPath('.//w:tr', namespaces=_NS)
+_XP_CELLS = etree.XPath('.//w:tc', namespaces=_NS)
+_XP_TEXT = etree.XPath('.//w:t/text()', namespaces=_NS, smart_strings=False)
+
+# Part every extractor reads, inside an unpacked directory or a .docx archive
+_DOCUMENT_XML = 'word/document.xml'
+
+# No entity expansion or network access, same guarantees defusedxml gave us
+_PARSER = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=True)
+
+# Field heuristics used by _extract_common_fields_from_text()
+_DATE_RE = _compile(r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|[A-Z][a-z]+ \d{1,2}, \d{4})')
+_CURRENCY_RE = _compile(r'\$[\d,.]+')
+_INVOICE_RE = _compile(r'(?i)(?:Invoice|Order)[\s#]*(\d+)')
+
+# Elements the streaming extractor reacts to
+_STREAM_TAGS = (
+    W + 't', W + 'p', W + 'tbl', W + 'tr', W + 'tc',
+    W + 'sdt', W + 'sdtContent', W + 'alias',
+)
 
 
 def extract_text_from_docx(unpacked_source_path: str) -> str:
@@ -19,7 +61,7 @@ def extract_text_from_docx(unpacked_source_path: str) -> str:
     w:t (text) elements. Preserves order but loses formatting/structure.
 
     Args:
-        unpacked_source_path: Path to unpacked DOCX directory
+        unpacked_source_path: Path to unpacked DOCX directory (or the .docx itself)
 
     Returns:
         String with all document text concatenated
@@ -28,20 +70,12 @@ def extract_text_from_docx(unpacked_source_path: str) -> str:
         text = extract_text_from_docx('unpacked_source')
         # Returns: "Invoice to Acme Corporation dated 2025-11-18..."
     """
-    doc_xml = os.path.join(unpacked_source_path, 'word/document.xml')
-
-    if not os.path.exists(doc_xml):
+    root = _parse_document(unpacked_source_path)
+    if root is None:
         return ""
 
     try:
-        dom = defused_minidom.parse(doc_xml)
-        text_runs = dom.getElementsByTagName('w:t')
-
-        text_content = ''.join([
-            t.firstChild.nodeValue for t in text_runs if t.firstChild
-        ])
-
-        return text_content
+        return _extract_text(root)
     except Exception as e:
         print(f"Error extracting text: {e}")
         return ""
@@ -55,7 +89,7 @@ def extract_table_data(unpacked_source_path: str) -> list:
     Each row is a list of cell texts, preserving table structure.
 
     Args:
-        unpacked_source_path: Path to unpacked DOCX directory
+        unpacked_source_path: Path to unpacked DOCX directory (or the .docx itself)
 
     Returns:
         List of tables, each table is list of rows, each row is list of cells:
@@ -77,39 +111,12 @@ def extract_table_data(unpacked_source_path: str) -> list:
             # first_table[0] = header row
             # first_table[1:] = data rows
     """
-    doc_xml = os.path.join(unpacked_source_path, 'word/document.xml')
-
-    if not os.path.exists(doc_xml):
+    root = _parse_document(unpacked_source_path, require=b'tbl')
+    if root is None:
         return []
 
     try:
-        dom = defused_minidom.parse(doc_xml)
-        tables = dom.getElementsByTagName('w:tbl')
-
-        table_data = []
-
-        for table in tables:
-            rows = table.getElementsByTagName('w:tr')
-            table_rows = []
-
-            for row in rows:
-                cells = row.getElementsByTagName('w:tc')
-                row_data = []
-
-                for cell in cells:
-                    # Extract all text from cell
-                    text_runs = cell.getElementsByTagName('w:t')
-                    cell_text = ''.join([
-                        t.firstChild.nodeValue for t in text_runs if t.firstChild
-                    ])
-                    row_data.append(cell_text.strip())
-
-                table_rows.append(row_data)
-
-            table_data.append(table_rows)
-
-        return table_data
-
+        return _extract_tables(root)
     except Exception as e:
         print(f"Error extracting table data: {e}")
         return []
@@ -130,7 +137,7 @@ def extract_sdt_fields(unpacked_source_path: str) -> dict:
     - Checkbox states
 
     Args:
-        unpacked_source_path: Path to unpacked DOCX directory
+        unpacked_source_path: Path to unpacked DOCX directory (or the .docx itself)
 
     Returns:
         Dictionary mapping field names (aliases) to their values:
@@ -145,51 +152,268 @@ def extract_sdt_fields(unpacked_source_path: str) -> dict:
         sdt_data = extract_sdt_fields('unpacked_source')
         client_name = sdt_data.get('CLIENT_NAME', 'Unknown')
     """
-    doc_xml = os.path.join(unpacked_source_path, 'word/document.xml')
+    root = _parse_document(unpacked_source_path, require=b'sdt')
+    if root is None:
+        return {}
 
-    if not os.path.exists(doc_xml):
+    try:
+        return _extract_sdt(root)
+    except Exception as e:
+        print(f"Error extracting SDT fields: {e}")
         return {}
 
+
+def _locate_document_xml(source_path: str) -> tuple:
+    """
+    Resolve where word/document.xml lives.
+
+    Returns:
+        (file_path, zipped): the .docx archive itself when source_path is a
+        .docx file, otherwise <source_path>/word/document.xml
+    """
+    source_path = os.fspath(source_path)
+    if source_path.lower().endswith('.docx') and os.path.isfile(source_path):
+        return source_path, True
+    # Plain concatenation; open() accepts forward slashes on every platform
+    return f"{source_path}/{_DOCUMENT_XML}", False
+
+
+def _open_document_xml(file_path: str, zipped: bool):
+    """Binary stream of document.xml, read straight from the archive when zipped."""
+    if zipped:
+        # The member stream stays readable after the ZipFile itself is closed
+        with zipfile.ZipFile(file_path) as zf:
+            return zf.open(_DOCUMENT_XML)
+    return open(file_path, 'rb')
+
+
+def _parse_document(unpacked_source_path: str, require: bytes = None):
+    """
+    Parse word/document.xml of an unpacked DOCX (or a .docx file) once.
+
+    Reads and parses are memoised on (path, mtime, size), so re-extracting
+    from an unchanged source reuses the tree. Callers must treat it as
+    read-only.
+
+    Args:
+        unpacked_source_path: Path to unpacked DOCX directory (or the .docx itself)
+        require: Optional byte string (e.g. b'sdt'); if the raw XML does not
+                 contain it the element cannot be present, so the parse is skipped
+
+    Returns:
+        The lxml root element, or None if the file is missing, unparsable or
+        lacks `require`
+    """
+    file_path, zipped = _locate_document_xml(unpacked_source_path)
+
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+
+    key = (os.path.abspath(file_path), zipped, st.st_mtime_ns, st.st_size)
     try:
-        dom = defused_minidom.parse(doc_xml)
-        sdts = dom.getElementsByTagName('w:sdt')
+        if require is not None and require not in _read_cached(*key):
+            return None
+        return _parse_cached(*key)
+    except Exception as e:
+        print(f"Error parsing document.xml: {e}")
+        return None
+
+
+@lru_cache(maxsize=4)
+def _read_cached(file_path: str, zipped: bool, mtime_ns: int, size: int) -> bytes:
+    """Raw document.xml bytes from file_path; mtime_ns/size only key the cache."""
+    with _open_document_xml(file_path, zipped) as fh:
+        return fh.read()
+
+
+@lru_cache(maxsize=4)
+def _parse_cached(file_path: str, zipped: bool, mtime_ns: int, size: int):
+    """Parse the document.xml bytes cached for the same key."""
+    return etree.fromstring(_read_cached(file_path, zipped, mtime_ns, size), _PARSER)
+
 
-        sdt_data = {}
+def _clear_document_cache() -> None:
+    """Drop cached document.xml bytes and trees."""
+    _read_cached.cache_clear()
+    _parse_cached.cache_clear()
 
-        for sdt in sdts:
-            try:
-                # Get field name from w:alias attribute
-                alias_elems = sdt.getElementsByTagName('w:alias')
-                if not alias_elems:
-                    continue
 
-                field_name = alias_elems[0].getAttribute('w:val')
-                if not field_name:
-                    continue
+_parse_document.cache_clear = _clear_document_cache
 
-                # Get field value from w:sdtContent
-                content_elems = sdt.getElementsByTagName('w:sdtContent')
-                if not content_elems:
-                    continue
 
-                content_elem = content_elems[0]
+def _run_text(elem) -> str:
+    """Concatenated text of every w:t below elem."""
+    return ''.join(_XP_TEXT(elem))
 
-                # Extract all text from content
-                text_runs = content_elem.getElementsByTagName('w:t')
-                field_value = ''.join([
-                    t.firstChild.nodeValue for t in text_runs if t.firstChild
-                ])
 
-                sdt_data[field_name] = field_value.strip()
+def _extract_text(root) -> str:
+    """extract_text_from_docx() on an already-parsed document root."""
+    return _run_text(root)
 
-            except (IndexError, AttributeError):
+
+def _extract_tables(root) -> list:
+    """extract_table_data() on an already-parsed document root."""
+    table_data = []
+
+    for table in root.iter(W + 'tbl'):
+        table_rows = []
+
+        for row in _XP_ROWS(table):
+            # Extract all text from each cell
+            table_rows.append([_run_text(cell).strip() for cell in _XP_CELLS(row)])
+
+        table_data.append(table_rows)
+
+    return table_data
+
+
+def _extract_sdt(root) -> dict:
+    """extract_sdt_fields() on an already-parsed document root."""
+    sdt_data = {}
+
+    for sdt in root.iter(W + 'sdt'):
+        # Get field name from w:alias attribute
+        alias_elem = next(sdt.iter(W + 'alias'), None)
+        if alias_elem is None:
+            continue
+
+        field_name = alias_elem.get(W + 'val')
+        if not field_name:
+            continue
+
+        # Get field value from w:sdtContent
+        content_elem = next(sdt.iter(W + 'sdtContent'), None)
+        if content_elem is None:
+            continue
+
+        sdt_data[field_name] = _run_text(content_elem).strip()
+
+    return sdt_data
+
+
+def _stream_extract(unpacked_source_path: str) -> tuple:
+    """
+    Extract text, tables and SDT fields in one streaming pass.
+
+    Equivalent to calling extract_text_from_docx, extract_table_data and
+    extract_sdt_fields, but word/document.xml is read once with
+    lxml.etree.iterparse and each top-level body element is freed as soon
+    as it has been consumed, so peak memory stays at one paragraph/table
+    instead of the whole DOM.
+
+    Args:
+        unpacked_source_path: Path to unpacked DOCX directory (or the .docx itself)
+
+    Returns:
+        (text, tables, sdt_fields) with the same shapes as the three
+        individual extractors
+    """
+    file_path, zipped = _locate_document_xml(unpacked_source_path)
+
+    text_parts = []
+    tables = []          # each table: list of rows, row: list of cell buffers
+    open_tables = []
+    open_rows = []
+    open_cells = []
+    sdts = []            # [alias, content buffer] in document order
+    open_sdts = []
+    open_contents = []
+    body_tag = W + 'body'
+
+    # Open directly (no separate exists() check); a missing document is not an error
+    try:
+        fh = _open_document_xml(file_path, zipped)
+    except (FileNotFoundError, NotADirectoryError):
+        return "", [], {}
+    except Exception as e:
+        print(f"Error extracting document data: {e}")
+        return "", [], {}
+
+    try:
+        context = etree.iterparse(
+            fh,
+            events=('start', 'end'),
+            tag=_STREAM_TAGS,
+            resolve_entities=False,
+            no_network=True,
+            huge_tree=True,
+        )
+        for event, elem in context:
+            tag = elem.tag
+            if event == 'start':
+                # Mirror getElementsByTagName: nested rows/cells/text also
+                # count towards every enclosing table/row/cell/SDT
+                if tag == W + 'tbl':
+                    open_tables.append([])
+                    tables.append(open_tables[-1])
+                elif tag == W + 'tr':
+                    row = []
+                    for table in open_tables:
+                        table.append(row)
+                    open_rows.append(row)
+                elif tag == W + 'tc':
+                    cell = []
+                    for row in open_rows:
+                        row.append(cell)
+                    open_cells.append(cell)
+                elif tag == W + 'sdt':
+                    open_sdts.append([None, None])
+                    sdts.append(open_sdts[-1])
+                elif tag == W + 'alias':
+                    for sdt in open_sdts:
+                        if sdt[0] is None:
+                            sdt[0] = elem.get(W + 'val', '')
+                elif tag == W + 'sdtContent':
+                    content = []
+                    for sdt in open_sdts:
+                        if sdt[1] is None:
+                            sdt[1] = content
+                    open_contents.append(content)
                 continue
 
-        return sdt_data
+            if tag == W + 't':
+                if elem.text:
+                    text_parts.append(elem.text)
+                    for cell in open_cells:
+                        cell.append(elem.text)
+                    for content in open_contents:
+                        content.append(elem.text)
+            elif tag == W + 'tbl':
+                open_tables.pop()
+            elif tag == W + 'tr':
+                open_rows.pop()
+            elif tag == W + 'tc':
+                open_cells.pop()
+            elif tag == W + 'sdt':
+                open_sdts.pop()
+            elif tag == W + 'sdtContent':
+                open_contents.pop()
+
+            # Free fully consumed top-level body content
+            parent = elem.getparent()
+            if parent is not None and parent.tag == body_tag:
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
 
     except Exception as e:
-        print(f"Error extracting SDT fields: {e}")
-        return {}
+        print(f"Error extracting document data: {e}")
+        return "", [], {}
+    finally:
+        fh.close()
+
+    table_data = [
+        [[''.join(cell).strip() for cell in row] for row in table]
+        for table in tables
+    ]
+    sdt_data = {
+        alias: ''.join(content).strip()
+        for alias, content in sdts
+        if alias and content is not None
+    }
+    return ''.join(text_parts), table_data, sdt_data
 
 
 def normalize_data(raw_data: dict, mapping: dict = None) -> dict:
@@ -220,12 +444,10 @@ def normalize_data(raw_data: dict, mapping: dict = None) -> dict:
     if not mapping:
         return raw_data
 
-    normalized = {}
-    for source_field, template_field in mapping.items():
-        if source_field in raw_data:
-            normalized[template_field] = raw_data[source_field]
-
-    return normalized
+    # Walk whichever side is smaller and probe the other
+    if len(raw_data) < len(mapping):
+        return {mapping[k]: v for k, v in raw_data.items() if k in mapping}
+    return {tf: raw_data[sf] for sf, tf in mapping.items() if sf in raw_data}
 
 
 def merge_data_sources(text_data: str, table_data: list, sdt_data: dict) -> dict:
@@ -258,27 +480,24 @@ def merge_data_sources(text_data: str, table_data: list, sdt_data: dict) -> dict
         )
         # Use merged['extracted_values'] for filling
     """
-    merged = {
-        'text': text_data,
-        'tables': table_data,
-        'sdt_fields': sdt_data,
-        'extracted_values': {}
-    }
-
-    # SDT fields are most structured - add them first
-    merged['extracted_values'].update(sdt_data)
-
     # Parse common fields from text
     text_based_fields = _extract_common_fields_from_text(text_data)
-    for field, value in text_based_fields.items():
-        if field not in merged['extracted_values']:
-            merged['extracted_values'][field] = value
 
     # Extract potential fields from tables
     table_based_fields = _extract_fields_from_tables(table_data)
-    for field, value in table_based_fields.items():
-        if field not in merged['extracted_values']:
-            merged['extracted_values'][field] = value
+
+    # Priority SDT > text > table. The first union fixes key order (SDT fields
+    # first, as before); the updates then let higher-priority values win
+    extracted_values = {**sdt_data, **text_based_fields, **table_based_fields}
+    extracted_values.update(text_based_fields)
+    extracted_values.update(sdt_data)
+
+    merged = {
+        'text': text_data,
+        'tables': table_data,
+        'sdt_fields': sdt_data,
+        'extracted_values': extracted_values
+    }
 
     return merged
 
@@ -302,27 +521,24 @@ def _extract_common_fields_from_text(text: str) -> dict:
         fields = _extract_common_fields_from_text(full_text)
         # Returns: {'DATE': '2025-11-18', 'AMOUNT': '$50,000', ...}
     """
-    import re
-
     fields = {}
 
+    # Only the first match of each pattern is used, so search() instead of findall()
+
     # Date patterns
-    date_pattern = r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|[A-Z][a-z]+ \d{1,2}, \d{4})'
-    dates = re.findall(date_pattern, text)
-    if dates:
-        fields['DATE'] = dates[0]
+    date = _DATE_RE.search(text)
+    if date:
+        fields['DATE'] = date.group(1)
 
     # Currency patterns
-    currency_pattern = r'\$[\d,.]+'
-    currencies = re.findall(currency_pattern, text)
-    if currencies:
-        fields['AMOUNT'] = currencies[0]
+    currency = _CURRENCY_RE.search(text)
+    if currency:
+        fields['AMOUNT'] = currency.group(0)
 
     # Invoice/Order number patterns
-    invoice_pattern = r'(?:Invoice|Order)[\s#]*(\d+)'
-    invoices = re.findall(invoice_pattern, text, re.IGNORECASE)
-    if invoices:
-        fields['INVOICE_NUMBER'] = invoices[0]
+    invoice = _INVOICE_RE.search(text)
+    if invoice:
+        fields['INVOICE_NUMBER'] = invoice.group(1)
 
     return fields
 
@@ -381,7 +597,7 @@ def comprehensive_data_extraction(unpacked_source_path: str) -> dict:
     comprehensive data structure ready for filling.
 
     Args:
-        unpacked_source_path: Path to unpacked source DOCX
+        unpacked_source_path: Path to unpacked source DOCX (or the .docx itself)
 
     Returns:
         Merged data from all extraction methods
@@ -390,23 +606,19 @@ def comprehensive_data_extraction(unpacked_source_path: str) -> dict:
         source_data = comprehensive_data_extraction('unpacked_source')
         # Use source_data['extracted_values'] for field filling
     """
-    print("Extracting data from source document...")
+    logger.debug("Extracting data from source document...")
 
-    # Extract via all 3 methods
-    text = extract_text_from_docx(unpacked_source_path)
-    print(f"  - Text extraction: {len(text)} characters")
-
-    tables = extract_table_data(unpacked_source_path)
-    print(f"  - Table extraction: {len(tables)} tables found")
-
-    sdt_fields = extract_sdt_fields(unpacked_source_path)
-    print(f"  - SDT extraction: {len(sdt_fields)} form fields found")
+    # Extract via all 3 methods in a single streaming pass
+    text, tables, sdt_fields = _stream_extract(unpacked_source_path)
+    logger.debug("  - Text extraction: %d characters", len(text))
+    logger.debug("  - Table extraction: %d tables found", len(tables))
+    logger.debug("  - SDT extraction: %d form fields found", len(sdt_fields))
 
     # Merge all sources
     merged = merge_data_sources(text, tables, sdt_fields)
 
-    print(f"  - Total extracted values: {len(merged['extracted_values'])}")
-    print(f"  - Fields: {list(merged['extracted_values'].keys())}")
+    logger.debug("  - Total extracted values: %d", len(merged['extracted_values']))
+    logger.debug("  - Fields: %s", merged['extracted_values'].keys())
 
     return merged
 
@@ -419,6 +631,9 @@ if __name__ == '__main__':
         print("Usage: python extraction_module.py <unpacked_docx_path>")
         sys.exit(1)
 
+    # Show the extraction progress messages
+    logging.basicConfig(level=logging.DEBUG, format='%(message)s')
+
     unpacked_path = sys.argv[1]
     print(f"Extracting from: {unpacked_path}\n")
 
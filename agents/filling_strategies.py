@@ -4,20 +4,100 @@ Filling Strategies Module - Phase 3 Implementation
 Implements 6 different strategies (A-F) for filling DOCX templates
 """
 
+import html
+import logging
+import re
+from functools import lru_cache
+
 from lib.document import Document
+from .process_pool import get_process_pool
 from typing import List, Tuple, Dict, Any
 
+try:
+    import ahocorasick
+except ImportError:  # optional speedup, per-format substring checks are used otherwise
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# {{NAME}} placeholders; compiled once so each paragraph is scanned in one pass
+_CURLY_PLACEHOLDER_RE = re.compile(r'\{\{([^{}]+)\}\}')
+
+_W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+def _fill_document(unpacked_dir: str, placeholders: dict) -> dict:
+    """Open one unpacked DOCX, run every strategy on it and save (pool worker)."""
+    return MultiStrategyFiller(Document(unpacked_dir)).fill_with_all_strategies(placeholders)
+
+
+def _make_value_run(doc_xml, rpr, value):
+    """Build <w:r>[rPr copy]<w:t>value</w:t></w:r> as DOM nodes.
+
+    Replaces formatting an XML string and re-parsing it: no fragment parse,
+    and the value is stored as text, so '&' or '<' in it can't break the XML.
+    Call doc_xml._inject_attributes_to_nodes([run]) once it is in the tree,
+    as replace_node()/insert_after() would.
+    """
+    dom = doc_xml.dom
+    run = dom.createElementNS(_W_NS, 'w:r')
+    if rpr is not None:
+        run.appendChild(rpr.cloneNode(True))
+    t = dom.createElementNS(_W_NS, 'w:t')
+    text = str(value)
+    if text:
+        t.appendChild(dom.createTextNode(text))
+    run.appendChild(t)
+    return run
+
+
+@lru_cache(maxsize=32)
+def _build_automaton(needles: frozenset):
+    """Aho-Corasick automaton over needles, shared by every fill with the same key set."""
+    automaton = ahocorasick.Automaton()
+    for needle in needles:
+        automaton.add_word(needle, needle)
+    automaton.make_automaton()
+    return automaton
+
+
+def _runs_containing(doc_xml, runs, needles: frozenset) -> Dict[str, list]:
+    """Map each needle to the runs whose text contains it, in one pass over runs.
+
+    Run text is taken the way get_node(contains=...) sees it, so a run is listed
+    for a needle exactly when get_node would have matched it.
+    """
+    hits = {}
+    if not needles:
+        return hits
+
+    automaton = _build_automaton(needles) if ahocorasick is not None else None
+
+    for run in runs:
+        text = doc_xml._get_element_text(run)
+        if automaton is not None:
+            found = {needle for _, needle in automaton.iter(text)}
+        elif '{' in text or '[' in text or '_' in text or '<' in text:
+            found = {needle for needle in needles if needle in text}
+        else:
+            continue
+        for needle in found:
+            hits.setdefault(needle, []).append(run)
+    return hits
+
 
 class FillingResult:
     """Track results of filling operation"""
 
     def __init__(self):
         self.filled = []
+        self._filled_set = set()  # Membership for add_filled; filled keeps the order
         self.skipped = []
         self.errors = []
 
     def add_filled(self, field_name: str):
-        if field_name not in self.filled:
+        if field_name not in self._filled_set:
+            self._filled_set.add(field_name)
             self.filled.append(field_name)
 
     def add_skipped(self, field_name: str, reason: str = ""):
@@ -45,25 +125,28 @@ class StrategyA:
     """
 
     @staticmethod
-    def _try_placeholder_formats(placeholder_name: str) -> List[str]:
+    @lru_cache(maxsize=4096)
+    def _try_placeholder_formats(placeholder_name: str) -> Tuple[str, ...]:
         """Generate placeholder in multiple formats to try
 
+        Memoised: the same field names recur across fills.
+
         Args:
             placeholder_name: Base placeholder name (without delimiters)
 
         Returns:
-            List of placeholder formats to try in order
+            Tuple of placeholder formats to try in order
         """
         # Normalize: remove any existing delimiters
         clean_name = placeholder_name.strip('{} []_<>')
 
         # Return formats to try in order of preference
-        return [
+        return (
             f"{{{{{clean_name}}}}}",      # {{PLACEHOLDER}}
             f"[{clean_name}]",             # [PLACEHOLDER]
             f"__{clean_name}__",           # __PLACEHOLDER__
             f"<<{clean_name}>>",           # <<PLACEHOLDER>>
-        ]
+        )
 
     @staticmethod
     def fill(doc: Document, placeholders: dict) -> FillingResult:
@@ -80,24 +163,52 @@ class StrategyA:
         result = FillingResult()
         doc_xml = doc["word/document.xml"]
 
+        formats = {
+            name: StrategyA._try_placeholder_formats(name) for name in placeholders
+        }
+
+        # Runs containing each placeholder format, found in one pass over the document
+        # instead of a get_node() walk per placeholder and format
+        needles = frozenset(html.unescape(f) for fmts in formats.values() for f in fmts)
+        runs_by_needle = _runs_containing(
+            doc_xml, doc_xml.dom.getElementsByTagName('w:r'), needles
+        )
+
+        def find_run(search_text: str):
+            """get_node(tag="w:r", contains=search_text) against the index."""
+            # Runs replaced by an earlier placeholder are detached (parentNode None)
+            matches = [
+                run for run in runs_by_needle.get(html.unescape(search_text), ())
+                if run.parentNode is not None
+            ]
+            if not matches:
+                raise ValueError(f"Node not found: <w:r> containing '{search_text}'")
+            if len(matches) > 1:
+                raise ValueError("Multiple nodes found: <w:r>")
+            return matches[0]
+
         for placeholder_name, value in placeholders.items():
             # Try multiple placeholder formats
-            formats_to_try = StrategyA._try_placeholder_formats(placeholder_name)
+            formats_to_try = formats[placeholder_name]
             filled = False
 
             for search_text in formats_to_try:
                 try:
                     # Find the text run containing placeholder
-                    node = doc_xml.get_node(tag="w:r", contains=search_text)
+                    node = find_run(search_text)
 
                     # Preserve formatting (run properties)
                     rpr_list = node.getElementsByTagName("w:rPr")
-                    rpr_xml = rpr_list[0].toxml() if rpr_list else ""
 
                     # Create replacement with same formatting
-                    replacement = f'<w:r>{rpr_xml}<w:t>{value}</w:t></w:r>'
+                    new_run = _make_value_run(doc_xml, rpr_list[0] if rpr_list else None, value)
+                    node.parentNode.replaceChild(new_run, node)
+                    doc_xml._inject_attributes_to_nodes([new_run])
+
+                    # The value may itself contain a later placeholder's text
+                    for needle, runs in _runs_containing(doc_xml, [new_run], needles).items():
+                        runs_by_needle.setdefault(needle, []).extend(runs)
 
-                    doc_xml.replace_node(node, replacement)
                     result.add_filled(placeholder_name)
                     filled = True
                     break  # Found and filled, move to next placeholder
@@ -206,10 +317,27 @@ class StrategyC:
         result = FillingResult()
         doc_xml = doc["word/document.xml"]
 
+        # Index runs by w:id once instead of scanning every run per field
+        runs_by_id = {}
+        for run in doc_xml.dom.getElementsByTagName('w:r'):
+            run_id = run.getAttribute('w:id')
+            if run_id:
+                runs_by_id.setdefault(run_id, []).append(run)
+
         for elem_id, new_value in id_mapping.items():
             try:
-                # Find element by attribute
-                node = doc_xml.get_node(tag="w:r", attrs={"w:id": elem_id})
+                matches = runs_by_id.get(elem_id, [])
+                if not matches:
+                    raise ValueError(
+                        f"Node not found: <w:r> with attributes {{'w:id': '{elem_id}'}}. "
+                        "Verify attribute values are correct."
+                    )
+                if len(matches) > 1:
+                    raise ValueError(
+                        "Multiple nodes found: <w:r>. "
+                        "Add more filters (attrs, line_number, or contains) to narrow the search."
+                    )
+                node = matches[0]
 
                 # Get text element
                 text_elems = node.getElementsByTagName('w:t')
@@ -256,29 +384,33 @@ class StrategyD:
         paragraphs = doc_xml.dom.getElementsByTagName('w:p')
 
         for paragraph in paragraphs:
-            text_runs = paragraph.getElementsByTagName('w:r')
-
-            # Collect all text in paragraph
+            # Collect all text in paragraph: one w:t walk of the paragraph rather
+            # than a walk per run (every w:t sits in a run, so the text is the same)
             combined_text = ''.join([
-                t.firstChild.nodeValue if t.firstChild else ''
-                for run in text_runs
-                for t in (run.getElementsByTagName('w:t') or [])
+                t.firstChild.nodeValue
+                for t in paragraph.getElementsByTagName('w:t')
                 if t.firstChild
             ])
 
+            # One scan for every {{NAME}} in the paragraph instead of one per field
+            if '{{' not in combined_text:
+                continue
+            present = set(_CURLY_PLACEHOLDER_RE.findall(combined_text))
+
+            # Runs are only needed for paragraphs that still hold a placeholder
+            text_runs = paragraph.getElementsByTagName('w:r')
+
             # Check if placeholder is in this paragraph
             for placeholder_name, value in placeholders.items():
-                search_text = f"{{{{{placeholder_name}}}}}"
-
-                if search_text not in combined_text:
+                if placeholder_name not in present:
                     continue
 
                 try:
                     # Get formatting from first run
-                    rpr_xml = ""
+                    rpr = None
                     if text_runs:
                         rpr_list = text_runs[0].getElementsByTagName('w:rPr')
-                        rpr_xml = rpr_list[0].toxml() if rpr_list else ""
+                        rpr = rpr_list[0] if rpr_list else None
 
                     # Remove all runs in paragraph (except pPr)
                     runs_to_remove = []
@@ -290,14 +422,15 @@ class StrategyD:
                         run.parentNode.removeChild(run)
 
                     # Insert replacement as single run
-                    new_run = f'<w:r>{rpr_xml}<w:t>{value}</w:t></w:r>'
+                    new_run = _make_value_run(doc_xml, rpr, value)
 
                     # Insert after paragraph properties
                     ppr_elems = paragraph.getElementsByTagName('w:pPr')
                     if ppr_elems:
-                        doc_xml.insert_after(ppr_elems[0], new_run)
+                        ppr_elems[0].parentNode.insertBefore(new_run, ppr_elems[0].nextSibling)
                     else:
-                        doc_xml.append_to(paragraph, new_run)
+                        paragraph.appendChild(new_run)
+                    doc_xml._inject_attributes_to_nodes([new_run])
 
                     result.add_filled(placeholder_name)
 
@@ -356,6 +489,16 @@ class StrategyE:
             for i in range(len(rows) - 1, 1, -1):
                 table.removeChild(rows[i])
 
+            # Get header names (the header row is not modified, so once per table)
+            header_names = []
+            for header_cell in header_row.getElementsByTagName('w:tc'):
+                text_elems = header_cell.getElementsByTagName('w:t')
+                header_text = ''.join([
+                    t.firstChild.nodeValue if t.firstChild else ''
+                    for t in text_elems
+                ])
+                header_names.append(header_text.strip())
+
             # Add rows for each data item
             for row_idx, row_data in enumerate(row_data_list):
                 try:
@@ -363,17 +506,6 @@ class StrategyE:
                     new_row = template_row.cloneNode(True)
 
                     cells = new_row.getElementsByTagName('w:tc')
-                    header_cells = header_row.getElementsByTagName('w:tc')
-
-                    # Get header names
-                    header_names = []
-                    for header_cell in header_cells:
-                        text_elems = header_cell.getElementsByTagName('w:t')
-                        header_text = ''.join([
-                            t.firstChild.nodeValue if t.firstChild else ''
-                            for t in text_elems
-                        ])
-                        header_names.append(header_text.strip())
 
                     # Fill cells with data
                     for cell_idx, cell in enumerate(cells):
@@ -390,7 +522,7 @@ class StrategyE:
                 except Exception as e:
                     result.add_error(f"row_{row_idx}", str(e))
 
-            print(f"Filled {len(result.filled)} rows in table {table_index}")
+            logger.debug("Filled %d rows in table %d", len(result.filled), table_index)
 
         except Exception as e:
             result.add_error(f"table_{table_index}", str(e))
@@ -454,67 +586,139 @@ class MultiStrategyFiller:
     def __init__(self, doc: Document):
         self.doc = doc
         self.results = {}
+        # Set when a strategy touched the tree since the last commit()
+        self.dirty = False
+        # Running totals over self.results, kept by _record() so get_summary() is O(1)
+        self._filled_counts: Dict[str, int] = {}  # name -> number of strategies that filled it
+        self._total_skipped = 0
+        self._total_errors = 0
+
+    def _record(self, strategy_name: str, result: FillingResult) -> None:
+        """Store a strategy result and fold it into the running totals"""
+        previous = self.results.get(strategy_name)
+        if previous is not None:
+            # Re-running a strategy (e.g. fill_table twice) replaces its result
+            for name in previous.filled:
+                self._filled_counts[name] -= 1
+                if not self._filled_counts[name]:
+                    del self._filled_counts[name]
+            self._total_skipped -= len(previous.skipped)
+            self._total_errors -= len(previous.errors)
+        self.results[strategy_name] = result
+        for name in result.filled:
+            self._filled_counts[name] = self._filled_counts.get(name, 0) + 1
+        self._total_skipped += len(result.skipped)
+        self._total_errors += len(result.errors)
+
+    def _track(self, result: FillingResult) -> FillingResult:
+        """Mark the document dirty if the strategy filled (or part-edited) anything"""
+        if result.filled or result.errors:
+            self.dirty = True
+        return result
 
-    def fill_with_all_strategies(self, placeholders: dict) -> dict:
+    def commit(self) -> None:
+        """Save the document once, only if a strategy changed it since the last save"""
+        if not self.dirty:
+            return
+        # Skip validation - pre-existing errors in template
+        self.doc.save(validate=False)
+        self.dirty = False
+
+    def fill_with_all_strategies(self, placeholders: dict, save: bool = True) -> dict:
         """Try all strategies to fill placeholders
 
+        Strategies run one after another on the same minidom tree: each one
+        edits it in place and D relies on A having already replaced
+        single-run placeholders, so they cannot be run concurrently.
+
         Args:
             placeholders: Dict of {placeholder_name: value}
+            save: Save when done; pass False and call commit() once when
+                  also filling tables
 
         Returns:
             Dict with results from each strategy
         """
-        print("\n=== Multi-Strategy Document Filling ===\n")
+        logger.debug("\n=== Multi-Strategy Document Filling ===\n")
 
         # Strategy A: Text placeholders
-        print("Strategy A: Text placeholder replacement...")
-        result_a = StrategyA.fill(self.doc, placeholders)
-        self.results['A-Text'] = result_a
-        print(f"  Result: {result_a.summary()}\n")
+        logger.debug("Strategy A: Text placeholder replacement...")
+        result_a = self._track(StrategyA.fill(self.doc, placeholders))
+        self._record('A-Text', result_a)
+        logger.debug("  Result: %s\n", result_a.summary())
 
         # Strategy B: SDT fields
-        print("Strategy B: Structured Data Tag replacement...")
-        result_b = StrategyB.fill(self.doc, placeholders)
-        self.results['B-SDT'] = result_b
-        print(f"  Result: {result_b.summary()}\n")
+        logger.debug("Strategy B: Structured Data Tag replacement...")
+        result_b = self._track(StrategyB.fill(self.doc, placeholders))
+        self._record('B-SDT', result_b)
+        logger.debug("  Result: %s\n", result_b.summary())
 
         # Strategy C: Element IDs (if provided)
         if self._has_element_ids(placeholders):
-            print("Strategy C: Element ID-based replacement...")
+            logger.debug("Strategy C: Element ID-based replacement...")
             id_mapping = self._convert_to_id_mapping(placeholders)
-            result_c = StrategyC.fill(self.doc, id_mapping)
-            self.results['C-ID'] = result_c
-            print(f"  Result: {result_c.summary()}\n")
+            result_c = self._track(StrategyC.fill(self.doc, id_mapping))
+            self._record('C-ID', result_c)
+            logger.debug("  Result: %s\n", result_c.summary())
 
         # Strategy D: Multi-run (automatic)
-        print("Strategy D: Multi-run placeholder handling...")
-        result_d = StrategyD.fill(self.doc, placeholders)
-        self.results['D-Multirun'] = result_d
-        print(f"  Result: {result_d.summary()}\n")
+        logger.debug("Strategy D: Multi-run placeholder handling...")
+        result_d = self._track(StrategyD.fill(self.doc, placeholders))
+        self._record('D-Multirun', result_d)
+        logger.debug("  Result: %s\n", result_d.summary())
 
-        # Save document after all replacements (skip validation - pre-existing errors in template)
-        self.doc.save(validate=False)
+        # Save document after all replacements
+        if save:
+            self.commit()
 
         return self.results
 
-    def fill_table(self, table_index: int, table_data: list) -> FillingResult:
+    def fill_table(self, table_index: int, table_data: list, save: bool = True) -> FillingResult:
         """Fill a specific table with data
 
         Args:
             table_index: Which table to fill (0-based)
             table_data: List of row data (dicts)
+            save: Save when done; pass False to batch with other fills
 
         Returns:
             FillingResult from table filling
         """
-        print(f"Strategy E: Table filling (table {table_index})...")
+        logger.debug("Strategy E: Table filling (table %d)...", table_index)
         result = StrategyE.fill(self.doc, table_index, table_data)
-        self.results['E-Table'] = result
-        print(f"  Result: {result.summary()}\n")
+        self.dirty = True  # Existing data rows are removed even when table_data is empty
+        self._record('E-Table', result)
+        logger.debug("  Result: %s\n", result.summary())
 
-        self.doc.save(validate=False)
+        if save:
+            self.commit()
         return result
 
+    @staticmethod
+    def fill_batch(doc_paths: List[str], placeholders_list: List[dict]) -> List[dict]:
+        """Fill several unpacked documents, one process per document
+
+        Each document is loaded, filled with fill_with_all_strategies() and
+        saved inside a worker, so fills run on separate cores instead of
+        sharing the GIL. Two or fewer documents are filled inline since pool
+        start-up would outweigh the work.
+
+        Args:
+            doc_paths: Unpacked DOCX directories
+            placeholders_list: Dict of {placeholder_name: value} per document
+
+        Returns:
+            One fill_with_all_strategies() result dict per document, in order
+        """
+        if len(doc_paths) != len(placeholders_list):
+            raise ValueError("doc_paths and placeholders_list must have the same length")
+        pairs = list(zip(doc_paths, placeholders_list))
+        if len(pairs) <= 2:
+            return [_fill_document(path, placeholders) for path, placeholders in pairs]
+        pool = get_process_pool()
+        futures = [pool.submit(_fill_document, path, placeholders) for path, placeholders in pairs]
+        return [f.result() for f in futures]
+
     def _has_element_ids(self, placeholders: dict) -> bool:
         """Check if placeholders contain element ID format"""
         # Simple check: IDs are typically like "field_company_name"
@@ -531,20 +735,11 @@ class MultiStrategyFiller:
 
     def get_summary(self) -> str:
         """Get summary of all strategies"""
-        all_filled = []
-        all_skipped = 0
-        all_errors = 0
-
-        for strategy_name, result in self.results.items():
-            all_filled.extend(result.filled)
-            all_skipped += len(result.skipped)
-            all_errors += len(result.errors)
-
         summary = f"""
 === FILLING SUMMARY ===
-Total filled: {len(set(all_filled))}
-Total skipped: {all_skipped}
-Total errors: {all_errors}
+Total filled: {len(self._filled_counts)}
+Total skipped: {self._total_skipped}
+Total errors: {self._total_errors}
 
 Strategies used: {', '.join(self.results.keys())}
 """
@@ -0,0 +1,31 @@
+"""Process pool shared by the batch helpers in docx_tools and filling_strategies"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# Created on first use; one pool for the whole process
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Shared process pool, started with forkserver where available (spawn otherwise).
+
+    fork is avoided: forking a multithreaded server (uvicorn, Agno's worker
+    threads) can copy a lock held by another thread into the child and deadlock it.
+    """
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                methods = multiprocessing.get_all_start_methods()
+                method = 'forkserver' if 'forkserver' in methods else 'spawn'
+                _POOL = ProcessPoolExecutor(
+                    max_workers=os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context(method),
+                )
+                atexit.register(_POOL.shutdown)
+    return _POOL
@@ -1,8 +1,26 @@
 """Session-aware workspace management for DOCX autofill agent"""
 import os
 import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+
+# Prefix of session trees renamed aside by cleanup_session() and awaiting deletion
+_TRASH_PREFIX = ".trash-"
+
+# Background deleter for renamed session trees, created on first use
+_PURGE_POOL: Optional[ThreadPoolExecutor] = None
+
+
+def _get_purge_pool() -> ThreadPoolExecutor:
+    """Shared thread pool that removes trashed session trees off the request path."""
+    global _PURGE_POOL
+    if _PURGE_POOL is None:
+        _PURGE_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="workspace-purge")
+    return _PURGE_POOL
+
 
 class SessionWorkspaceManager:
     """Manages isolated workspace directories for each session"""
@@ -11,70 +29,130 @@ class SessionWorkspaceManager:
         """Initialize workspace manager"""
         self.base_dir = Path(base_workspace_dir)
         self.base_dir.mkdir(parents=True, exist_ok=True)
+        # Session paths are pure arithmetic on base_dir, so they never go stale; the
+        # mkdir in ensure() still runs on every getter call in case a directory was
+        # removed behind this manager's back (another worker, a purge, an operator)
+        self._path_for = lru_cache(maxsize=1024)(self._build_path)
+        self._purge_leftover_trash()
+
+    def _purge_leftover_trash(self) -> None:
+        """Queue deletion of trash left behind by a process that exited mid-cleanup"""
+        with os.scandir(self.base_dir) as it:
+            for entry in it:
+                if entry.name.startswith(_TRASH_PREFIX) and entry.is_dir(follow_symlinks=False):
+                    _get_purge_pool().submit(shutil.rmtree, entry.path, ignore_errors=True)
+
+    def _build_path(self, session_id: str, sub: Optional[str] = None) -> Path:
+        """Path of a session directory or subdirectory, without touching the filesystem"""
+        session_dir = self.base_dir / session_id
+        return session_dir / sub if sub else session_dir
+
+    @staticmethod
+    def ensure(path: Path) -> Path:
+        """Create path (and parents) for a caller that is about to write into it"""
+        path.mkdir(parents=True, exist_ok=True)
+        return path
 
     def get_session_dir(self, session_id: str) -> Path:
         """Get session directory"""
-        session_dir = self.base_dir / session_id
-        session_dir.mkdir(parents=True, exist_ok=True)
-        return session_dir
+        return self.ensure(self._path_for(session_id))
 
     def get_input_dir(self, session_id: str) -> Path:
         """Get input directory for uploaded files"""
-        input_dir = self.get_session_dir(session_id) / "input"
-        input_dir.mkdir(parents=True, exist_ok=True)
-        return input_dir
+        return self.ensure(self._path_for(session_id, "input"))
 
     def get_unpacked_dir(self, session_id: str) -> Path:
         """Get directory for unpacked DOCX files"""
-        unpacked_dir = self.get_session_dir(session_id) / "unpacked"
-        unpacked_dir.mkdir(parents=True, exist_ok=True)
-        return unpacked_dir
+        return self.ensure(self._path_for(session_id, "unpacked"))
+
+    def get_sources_dir(self, session_id: str) -> Path:
+        """Get directory for source DOCX files unpacked only for data extraction"""
+        return self.ensure(self._path_for(session_id, "sources"))
 
     def get_debug_dir(self, session_id: str) -> Path:
         """Get directory for debug/analysis files"""
-        debug_dir = self.get_session_dir(session_id) / "debug"
-        debug_dir.mkdir(parents=True, exist_ok=True)
-        return debug_dir
+        return self.ensure(self._path_for(session_id, "debug"))
 
     def get_output_dir(self, session_id: str) -> Path:
         """Get directory for output filled DOCX files"""
-        output_dir = self.get_session_dir(session_id) / "output"
-        output_dir.mkdir(parents=True, exist_ok=True)
-        return output_dir
+        return self.ensure(self._path_for(session_id, "output"))
+
+    def clone_template(self, session_id: str, template_dir: str) -> Path:
+        """Populate the session's unpacked directory from an unpacked template tree"""
+        # Plain copies, never hardlinks: unpack, the unpack cache and Document.save all
+        # rewrite parts in place, which would write through a link into the template
+        unpacked_dir = self.get_unpacked_dir(session_id)
+        shutil.copytree(template_dir, unpacked_dir, dirs_exist_ok=True)
+        return unpacked_dir
+
+    def iter_input_files(self, session_id: str) -> Iterator[str]:
+        """Yield input file names for session as os.scandir produces them"""
+        return self._iter_files(self._path_for(session_id, "input"))
+
+    def iter_output_files(self, session_id: str) -> Iterator[str]:
+        """Yield output file names for session as os.scandir produces them"""
+        return self._iter_files(self._path_for(session_id, "output"))
+
+    @staticmethod
+    def _iter_files(directory: Path) -> Iterator[str]:
+        """Yield names of regular files in directory"""
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_file():
+                        yield entry.name
+        except FileNotFoundError:
+            return
+
+    def count_files(self, session_id: str, subdir: str) -> int:
+        """Count regular files in a session subdirectory without listing names"""
+        dir_path = self._path_for(session_id, subdir)
+        try:
+            with os.scandir(dir_path) as it:
+                return sum(1 for entry in it if entry.is_file())
+        except FileNotFoundError:
+            return 0
 
     def list_input_files(self, session_id: str) -> list:
         """List all input files for session"""
-        input_dir = self.get_input_dir(session_id)
-        if not input_dir.exists():
-            return []
-        return [f.name for f in input_dir.iterdir() if f.is_file()]
+        return list(self.iter_input_files(session_id))
 
     def list_output_files(self, session_id: str) -> list:
         """List all output files for session"""
-        output_dir = self.get_output_dir(session_id)
-        if not output_dir.exists():
-            return []
-        return [f.name for f in output_dir.iterdir() if f.is_file()]
+        return list(self.iter_output_files(session_id))
 
     def cleanup_session(self, session_id: str) -> bool:
-        """Delete all files for a session"""
-        session_dir = self.get_session_dir(session_id)
+        """Delete all files for a session
+
+        The tree is renamed aside (one syscall) and removed on a background
+        thread, so the caller does not wait for every unlink.
+        """
+        session_dir = self._path_for(session_id)
+        trash_dir = self.base_dir / f"{_TRASH_PREFIX}{uuid.uuid4().hex}"
         try:
-            shutil.rmtree(session_dir)
+            os.rename(session_dir, trash_dir)
+            _get_purge_pool().submit(shutil.rmtree, trash_dir, ignore_errors=True)
             return True
-        except Exception as e:
-            print(f"Error cleaning up session {session_id}: {e}")
-            return False
+        except FileNotFoundError:
+            return True  # Nothing on disk for this session
+        except OSError:
+            # Rename refused (e.g. an open handle on Windows): delete in place
+            try:
+                shutil.rmtree(session_dir)
+                return True
+            except Exception as e:
+                print(f"Error cleaning up session {session_id}: {e}")
+                return False
 
     def get_session_info(self, session_id: str) -> dict:
         """Get information about session workspace"""
         return {
             "session_id": session_id,
-            "session_dir": str(self.get_session_dir(session_id)),
+            "session_dir": str(self._path_for(session_id)),
             "input_files": self.list_input_files(session_id),
             "output_files": self.list_output_files(session_id),
-            "unpacked_dir": str(self.get_unpacked_dir(session_id)),
-            "debug_dir": str(self.get_debug_dir(session_id))
+            "unpacked_dir": str(self._path_for(session_id, "unpacked")),
+            "debug_dir": str(self._path_for(session_id, "debug"))
         }
 
     def update_last_accessed(self, session_id: str) -> None:
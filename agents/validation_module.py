@@ -5,10 +5,86 @@ Validation & QA Module - Phase 5 Implementation
 """
 
 import os
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Optional
+from lxml import etree
 from lib.document import Document
 
+try:
+    import ahocorasick
+except ImportError:  # optional speedup, the placeholder regex is used otherwise
+    ahocorasick = None
+
+# Well-formedness check parser: no entity expansion or network access
+_WF_PARSER = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=True)
+
+# WordprocessingML names for the lxml side of Tier 1
+_W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+_W = f'{{{_W_NS}}}'
+_W_T = f'{_W}t'
+_W_SDT = f'{_W}sdt'
+_W_SDT_CONTENT = f'{_W}sdtContent'
+_W_ALIAS_PATH = f'{_W}sdtPr/{_W}alias'
+_W_VAL = f'{_W}val'
+_XP_TEXT = etree.XPath('.//w:t/text()', namespaces={'w': _W_NS}, smart_strings=False)
+
+_ELEMENT_NODE = 1  # xml.dom.Node.ELEMENT_NODE
+_TEXT_NODE = 3  # xml.dom.Node.TEXT_NODE
+
+
+@lru_cache(maxsize=32)
+def _placeholder_regex(fields: frozenset) -> "re.Pattern":
+    """One alternation of every {{field}} token, shared by repeat validations of a field set"""
+    return re.compile('|'.join(re.escape(f"{{{{{field}}}}}") for field in fields))
+
+
+@lru_cache(maxsize=32)
+def _placeholder_automaton(fields: frozenset):
+    """Aho-Corasick automaton mapping each {{field}} token to its field name"""
+    automaton = ahocorasick.Automaton()
+    for field in fields:
+        automaton.add_word(f"{{{{{field}}}}}", field)
+    automaton.make_automaton()
+    return automaton
+
+
+def _placeholders_in(text: str, fields: frozenset) -> set:
+    """Names of the fields whose {{field}} token occurs in text, in one pass"""
+    if ahocorasick is not None:
+        return {field for _, field in _placeholder_automaton(fields).iter(text)}
+    return {token[2:-2] for token in _placeholder_regex(fields).findall(text)}
+
+
+def _first_child(node, tag_name: str):
+    """First direct child element named tag_name, or None"""
+    child = node.firstChild
+    while child is not None:
+        if child.nodeType == _ELEMENT_NODE and child.tagName == tag_name:
+            return child
+        child = child.nextSibling
+    return None
+
+
+def _first_descendant(node, tag_name: str):
+    """First descendant element named tag_name in document order, or None
+
+    Same element as node.getElementsByTagName(tag_name)[0], but stops at the
+    first match instead of collecting every descendant.
+    """
+    stack = [node.firstChild] if node.firstChild is not None else []
+    while stack:
+        current = stack.pop()
+        if current.nextSibling is not None:
+            stack.append(current.nextSibling)
+        if current.nodeType == _ELEMENT_NODE:
+            if current.tagName == tag_name:
+                return current
+            if current.firstChild is not None:
+                stack.append(current.firstChild)
+    return None
+
 
 class ValidationResult:
     """Track validation results"""
@@ -44,7 +120,8 @@ class Tier1PlaceholderValidation:
     """Tier 1: Verify all expected placeholders were filled"""
 
     @staticmethod
-    def validate(doc: Document, expected_fields: list) -> ValidationResult:
+    def validate(doc: Document, expected_fields: list,
+                 root: Optional[etree._Element] = None) -> ValidationResult:
         """Verify all placeholders were replaced
 
         Checks for remaining {{PLACEHOLDER}} patterns and SDT fields
@@ -53,37 +130,26 @@ class Tier1PlaceholderValidation:
         Args:
             doc: Document instance
             expected_fields: List of field names that should be filled
+            root: word/document.xml already parsed with lxml (the minidom
+                  tree is walked if omitted)
 
         Returns:
             ValidationResult with pass/fail/warning status
         """
         result = ValidationResult()
         doc_xml = doc["word/document.xml"]
-        doc_text = doc_xml.dom.toxml()
 
         unfilled_placeholders = []
-        unfilled_sdts = []
 
-        # Check for unfilled text placeholders
-        for field in expected_fields:
-            search_text = f"{{{{{field}}}}}"
-            if search_text in doc_text:
-                unfilled_placeholders.append(field)
+        # Check for unfilled text placeholders: one walk over the w:t text nodes
+        # (no toxml() of the whole part) and one regex scan for every field
+        if expected_fields:
+            doc_text = Tier1PlaceholderValidation._document_text(doc_xml, root)
+            found = _placeholders_in(doc_text, frozenset(expected_fields))
+            unfilled_placeholders = [field for field in expected_fields if field in found]
 
         # Check for unfilled SDT fields
-        sdts = doc_xml.dom.getElementsByTagName('w:sdt')
-        for sdt in sdts:
-            alias_elems = sdt.getElementsByTagName('w:alias')
-            if alias_elems:
-                field_name = alias_elems[0].getAttribute('w:val')
-                if field_name in expected_fields:
-                    content_elems = sdt.getElementsByTagName('w:sdtContent')
-                    if content_elems:
-                        text_elems = content_elems[0].getElementsByTagName('w:t')
-                        if text_elems:
-                            text_val = text_elems[0].firstChild.nodeValue if text_elems[0].firstChild else ""
-                            if not text_val or text_val.strip() == "":
-                                unfilled_sdts.append(field_name)
+        unfilled_sdts = Tier1PlaceholderValidation._blank_sdts(doc_xml, root, expected_fields)
 
         # Report results
         if not unfilled_placeholders and not unfilled_sdts:
@@ -105,6 +171,57 @@ class Tier1PlaceholderValidation:
 
         return result
 
+    @staticmethod
+    def _document_text(doc_xml, root: Optional[etree._Element]) -> str:
+        """Concatenated w:t text of word/document.xml"""
+        if root is not None:
+            return ''.join(_XP_TEXT(root))
+        # Every text child, not just firstChild: the parser splits text around
+        # entity references, so "A&amp;B" is three text nodes
+        return ''.join([
+            node.data
+            for t in doc_xml.dom.getElementsByTagName('w:t')
+            for node in t.childNodes
+            if node.nodeType == _TEXT_NODE
+        ])
+
+    @staticmethod
+    def _blank_sdts(doc_xml, root: Optional[etree._Element], expected_fields: list) -> List[str]:
+        """Aliases of expected SDT fields whose first w:t is empty or whitespace"""
+        unfilled_sdts = []
+        if root is not None:
+            # lxml: the element walk and child lookups run in C
+            for sdt in root.iter(_W_SDT):
+                alias = sdt.find(_W_ALIAS_PATH)
+                if alias is None:
+                    continue
+                field_name = alias.get(_W_VAL, '')
+                if field_name in expected_fields:
+                    content = sdt.find(_W_SDT_CONTENT)
+                    if content is not None:
+                        text_elem = next(content.iter(_W_T), None)
+                        if text_elem is not None:
+                            text_val = text_elem.text or ""
+                            if not text_val or text_val.strip() == "":
+                                unfilled_sdts.append(field_name)
+            return unfilled_sdts
+
+        for sdt in doc_xml.dom.getElementsByTagName('w:sdt'):
+            # sdt -> sdtPr -> alias and sdt -> sdtContent are direct children
+            sdt_pr = _first_child(sdt, 'w:sdtPr')
+            alias = _first_child(sdt_pr, 'w:alias') if sdt_pr is not None else None
+            if alias is not None:
+                field_name = alias.getAttribute('w:val')
+                if field_name in expected_fields:
+                    content = _first_child(sdt, 'w:sdtContent')
+                    if content is not None:
+                        text_elem = _first_descendant(content, 'w:t')
+                        if text_elem is not None:
+                            text_val = text_elem.firstChild.nodeValue if text_elem.firstChild else ""
+                            if not text_val or text_val.strip() == "":
+                                unfilled_sdts.append(field_name)
+        return unfilled_sdts
+
 
 class Tier2DocumentIntegrityValidation:
     """Tier 2: Check document structure integrity"""
@@ -130,11 +247,14 @@ class Tier2DocumentIntegrityValidation:
             '_rels/.rels'
         ]
 
+        # Every path checked below lives in the root, word/ or _rels/: list those
+        # three directories once instead of stat-ing each path
+        present = Tier2DocumentIntegrityValidation._list_entries(unpacked_path)
+
         # Check required files
         all_exist = True
         for file_path in required_files:
-            full_path = os.path.join(unpacked_path, file_path)
-            if os.path.exists(full_path):
+            if file_path in present:
                 result.add_pass("File Check", f"Found: {file_path}")
             else:
                 result.add_fail("File Check", f"Missing: {file_path}")
@@ -149,17 +269,16 @@ class Tier2DocumentIntegrityValidation:
         ]
 
         for file_path in optional_files:
-            full_path = os.path.join(unpacked_path, file_path)
-            if os.path.exists(full_path):
+            if file_path in present:
                 result.add_pass("Optional Files", f"Found: {file_path}")
             else:
                 result.add_warning("Optional Files", f"Missing: {file_path}")
 
-        # Check document.xml is readable
+        # Check document.xml is readable (the declaration is in the first bytes)
         try:
             doc_path = os.path.join(unpacked_path, 'word/document.xml')
-            with open(doc_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            with open(doc_path, 'rb') as f:
+                content = f.read(200).decode('utf-8', errors='ignore')
                 if content and '<?xml' in content:
                     result.add_pass("XML Format", "document.xml is valid XML declaration")
                 else:
@@ -172,29 +291,57 @@ class Tier2DocumentIntegrityValidation:
 
         return result
 
+    @staticmethod
+    def _list_entries(unpacked_path: str) -> set:
+        """Relative names in the root, word/ and _rels/ ("name/" marks a directory)"""
+        present = set()
+        for subdir in ('', 'word', '_rels'):
+            prefix = f"{subdir}/" if subdir else ""
+            try:
+                with os.scandir(os.path.join(unpacked_path, subdir)) as it:
+                    for entry in it:
+                        present.add(prefix + entry.name)
+                        if entry.is_dir():
+                            present.add(f"{prefix}{entry.name}/")
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+        return present
+
 
 class Tier3XMLValidation:
     """Tier 3: Validate XML well-formedness"""
 
     @staticmethod
-    def validate(doc: Document) -> ValidationResult:
+    def validate(doc: Document, serialized: Optional[Dict[str, bytes]] = None,
+                 parsed: Optional[Dict[str, etree._Element]] = None) -> ValidationResult:
         """Validate XML well-formedness
 
-        Attempts to save and validate the document structure.
+        Re-parses every loaded part from its in-memory DOM; nothing is written
+        to disk (the caller has already saved the document).
         Skips schema validation since templates may have pre-existing errors.
 
         Args:
             doc: Document instance
+            serialized: Parts already serialized by the caller, {xml_path: utf-8 bytes}
+            parsed: Parts the caller already parsed successfully, {xml_path: root}
 
         Returns:
             ValidationResult from XML validation
         """
         result = ValidationResult()
+        serialized = serialized or {}
+        parsed = parsed or {}
 
         try:
-            # Save without schema validation - templates may have pre-existing errors
             # We only verify the document is still XML well-formed after our changes
-            doc.save(validate=False)
+            for xml_path, editor in doc._editors.items():
+                if parsed.get(xml_path) is not None:
+                    continue  # Already parsed without error
+                xml_bytes = serialized.get(xml_path)
+                if xml_bytes is None:
+                    # Straight to UTF-8 bytes: no intermediate str to encode
+                    xml_bytes = editor.dom.toxml(encoding='utf-8')
+                etree.fromstring(xml_bytes, _WF_PARSER)
             result.add_pass("XML Well-formedness", "Document XML is well-formed (no structural breaks)")
 
         except Exception as e:
@@ -232,11 +379,19 @@ class ComprehensiveValidator:
 
         all_valid = True
 
+        # Serialize and lxml-parse document.xml once: Tier 1 walks the lxml tree
+        # and Tier 3 counts the successful parse as its well-formedness check
+        doc_bytes = self.doc["word/document.xml"].dom.toxml(encoding='utf-8')
+        try:
+            root = etree.fromstring(doc_bytes, _WF_PARSER)
+        except etree.XMLSyntaxError:
+            root = None  # Tier 1 falls back to the minidom tree, Tier 3 reports the error
+
         # Tier 1: Placeholder completion
         if expected_fields:
             print("Tier 1: Placeholder Completion Check")
             print("-" * 40)
-            result1 = Tier1PlaceholderValidation.validate(self.doc, expected_fields)
+            result1 = Tier1PlaceholderValidation.validate(self.doc, expected_fields, root)
             self.results['Tier1-Placeholders'] = result1
 
             print(f"  Checked: {len(expected_fields)} expected fields")
@@ -269,7 +424,9 @@ class ComprehensiveValidator:
         # Tier 3: XML validation
         print("\nTier 3: XML Well-formedness Check")
         print("-" * 40)
-        result3 = Tier3XMLValidation.validate(self.doc)
+        result3 = Tier3XMLValidation.validate(
+            self.doc, {"word/document.xml": doc_bytes}, {"word/document.xml": root}
+        )
         self.results['Tier3-XML'] = result3
 
         for check, msg in result3.passed:
@@ -294,31 +451,27 @@ class ComprehensiveValidator:
 
     def get_detailed_report(self) -> str:
         """Get detailed validation report"""
-        report = "VALIDATION REPORT\n"
-        report += "="*60 + "\n\n"
+        lines = ["VALIDATION REPORT", "="*60, ""]
 
         for tier_name, result in self.results.items():
-            report += f"{tier_name}:\n"
-            report += "-"*40 + "\n"
+            lines.append(f"{tier_name}:")
+            lines.append("-"*40)
 
             if result.passed:
-                report += "PASSED:\n"
-                for check, msg in result.passed:
-                    report += f"  ✓ {check}: {msg}\n"
+                lines.append("PASSED:")
+                lines.extend(f"  ✓ {check}: {msg}" for check, msg in result.passed)
 
             if result.warnings:
-                report += "WARNINGS:\n"
-                for check, msg in result.warnings:
-                    report += f"  ⚠ {check}: {msg}\n"
+                lines.append("WARNINGS:")
+                lines.extend(f"  ⚠ {check}: {msg}" for check, msg in result.warnings)
 
             if result.failed:
-                report += "FAILED:\n"
-                for check, msg in result.failed:
-                    report += f"  ✗ {check}: {msg}\n"
+                lines.append("FAILED:")
+                lines.extend(f"  ✗ {check}: {msg}" for check, msg in result.failed)
 
-            report += "\n"
+            lines.append("")
 
-        return report
+        return "\n".join(lines) + "\n"
 
 
 def quick_validate(doc: Document, expected_fields: list) -> tuple:
@@ -5,23 +5,26 @@ from dotenv import load_dotenv
 from fastapi import File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List
+import asyncio
 import logging
+import os
 import re
 import uuid
 
-# Load environment variables from .env file
+# Load environment variables from .env file (once; the agent factory skips its own load)
 load_dotenv()
+os.environ["DOCX_AGENT_ENV_LOADED"] = "1"
 
 from agno.os import AgentOS
 
 # Use the session-aware agent for proper session isolation
-from agents.docx_agent_with_sessions import docx_agent_with_sessions
+from agents.docx_agent_with_sessions import get_docx_agent
 from agents.session_workspace import SessionWorkspaceManager
 
 # Create the AgentOS with session-isolated agent
 agent_os = AgentOS(
     os_id="docx-autofill-os",
-    agents=[docx_agent_with_sessions],
+    agents=[get_docx_agent()],
 )
 app = agent_os.get_app()
 
@@ -30,15 +33,20 @@ logger = logging.getLogger(__name__)
 
 # File upload configuration
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
-ALLOWED_EXTENSIONS = {'.docx', '.doc', '.pptx', '.txt', '.md', '.pdf'}
-ALLOWED_MIME_TYPES = {
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Uploads are streamed to disk 1MB at a time
+ALLOWED_EXTENSIONS = frozenset({'.docx', '.doc', '.pptx', '.txt', '.md', '.pdf'})
+ALLOWED_MIME_TYPES = frozenset({
     'application/pdf',
     'application/msword',
     'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
     'application/vnd.openxmlformats-officedocument.presentationml.presentation',
     'text/plain',
     'text/markdown',
-}
+})
+
+# Filename characters replaced by sanitize_filename(), and the accepted session_id format
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\s\-.]')
+_SESSION_ID_RE = re.compile(r'\A[\w\-]+\Z')
 
 # Startup event to load MCP tools
 @app.on_event("startup")
@@ -68,7 +76,7 @@ def sanitize_filename(filename: str) -> str:
 	filename = Path(filename).name
 
 	# Remove or replace dangerous characters
-	filename = re.sub(r'[^\w\s\-.]', '_', filename)
+	filename = _UNSAFE_FILENAME_CHARS.sub('_', filename)
 
 	# Remove leading/trailing dots and spaces
 	filename = filename.strip('. ')
@@ -80,26 +88,21 @@ def sanitize_filename(filename: str) -> str:
 	return filename
 
 
-def validate_file(file: UploadFile, content: bytes) -> None:
+def validate_file(file: UploadFile) -> None:
 	"""
-	Validate file type and size.
+	Validate file type before any content is read.
+
+	Size and emptiness are checked while the upload streams to disk
+	(see save_upload).
 
 	Args:
 		file: Uploaded file object
-		content: File content bytes
 
 	Raises:
 		HTTPException: If validation fails
 	"""
-	# Check file size
-	if len(content) > MAX_FILE_SIZE:
-		raise HTTPException(
-			status_code=413,
-			detail=f"File '{file.filename}' exceeds maximum size of {MAX_FILE_SIZE // (1024*1024)}MB"
-		)
-
 	# Check file extension
-	file_ext = Path(file.filename).suffix.lower()
+	file_ext = os.path.splitext(file.filename)[1].lower()
 	if file_ext not in ALLOWED_EXTENSIONS:
 		raise HTTPException(
 			status_code=400,
@@ -113,12 +116,52 @@ def validate_file(file: UploadFile, content: bytes) -> None:
 			detail=f"MIME type '{file.content_type}' not allowed"
 		)
 
-	# Check for empty files
-	if len(content) == 0:
-		raise HTTPException(
-			status_code=400,
-			detail=f"File '{file.filename}' is empty"
-		)
+
+async def save_upload(file: UploadFile, filepath: Path) -> int:
+	"""
+	Stream an upload to disk in UPLOAD_CHUNK_SIZE chunks, enforcing the size limit.
+
+	Only one chunk is held in memory at a time; a rejected upload leaves no
+	partial file behind. Disk writes run in a worker thread so the event
+	loop keeps serving other requests.
+
+	Args:
+		file: Uploaded file object
+		filepath: Destination path
+
+	Returns:
+		Number of bytes written
+
+	Raises:
+		HTTPException: If the file is too large or empty
+	"""
+	size = 0
+	try:
+		f = await asyncio.to_thread(open, filepath, 'wb')
+		try:
+			while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+				size += len(chunk)
+				# Check file size
+				if size > MAX_FILE_SIZE:
+					raise HTTPException(
+						status_code=413,
+						detail=f"File '{file.filename}' exceeds maximum size of {MAX_FILE_SIZE // (1024*1024)}MB"
+					)
+				await asyncio.to_thread(f.write, chunk)
+		finally:
+			await asyncio.to_thread(f.close)
+
+		# Check for empty files
+		if size == 0:
+			raise HTTPException(
+				status_code=400,
+				detail=f"File '{file.filename}' is empty"
+			)
+	except BaseException:
+		Path(filepath).unlink(missing_ok=True)
+		raise
+
+	return size
 
 
 def generate_unique_filename(workspace: SessionWorkspaceManager, filename: str) -> str:
@@ -143,7 +186,7 @@ def generate_unique_filename(workspace: SessionWorkspaceManager, filename: str)
 	file_ext = Path(filename).suffix
 	unique_filename = f"{uuid.uuid4().hex[:8]}_{file_stem}{file_ext}"
 
-	logger.info(f"File '{filename}' already exists, renamed to '{unique_filename}'")
+	logger.info("File '%s' already exists, renamed to '%s'", filename, unique_filename)
 
 	return unique_filename
 
@@ -168,7 +211,7 @@ async def upload_files(
 		HTTPException: If validation fails or errors occur
 	"""
 	# Validate session_id format (alphanumeric and hyphens only)
-	if not re.match(r'^[\w\-]+$', session_id):
+	if not _SESSION_ID_RE.match(session_id):
 		raise HTTPException(
 			status_code=400,
 			detail="Invalid session_id format"
@@ -185,7 +228,7 @@ async def upload_files(
 	try:
 		workspace = SessionWorkspaceManager(session_id=session_id)
 	except Exception as e:
-		logger.error(f"Failed to initialize workspace for session {session_id}: {e}")
+		logger.error("Failed to initialize workspace for session %s: %s", session_id, e)
 		raise HTTPException(
 			status_code=500,
 			detail="Failed to initialize session workspace"
@@ -197,11 +240,8 @@ async def upload_files(
 	# Process each file
 	for file in files:
 		try:
-			# Read file content
-			content = await file.read()
-
-			# Validate file
-			validate_file(file, content)
+			# Validate file type (size is checked while streaming)
+			validate_file(file)
 
 			# Sanitize filename
 			safe_filename = sanitize_filename(file.filename)
@@ -209,27 +249,26 @@ async def upload_files(
 			# Generate unique filename if duplicate exists
 			unique_filename = generate_unique_filename(workspace, safe_filename)
 
-			# Save file to workspace
+			# Stream file to workspace
 			filepath = workspace.get_input_path(unique_filename)
-			with open(filepath, 'wb') as f:
-				f.write(content)
+			size = await save_upload(file, filepath)
 
 			uploaded.append({
 				"original_filename": file.filename,
 				"stored_filename": unique_filename,
-				"size": len(content),
+				"size": size,
 				"content_type": file.content_type,
 				"relative_path": f"input/{unique_filename}"
 			})
 
-			logger.info(f"Uploaded {file.filename} ({len(content)} bytes) to {filepath}")
+			logger.info("Uploaded %s (%d bytes) to %s", file.filename, size, filepath)
 
 		except HTTPException:
 			# Re-raise HTTP exceptions (validation errors)
 			raise
 		except Exception as e:
 			# Log and collect other errors
-			logger.error(f"Error uploading {file.filename}: {e}")
+			logger.error("Error uploading %s: %s", file.filename, e)
 			failed.append({
 				"filename": file.filename,
 				"error": str(e)
@@ -639,7 +639,7 @@ class Document:
         # Create temporary directory with subdirectories for unpacked content and baseline
         self.temp_dir = tempfile.mkdtemp(prefix="docx_")
         self.unpacked_path = Path(self.temp_dir) / "unpacked"
-        shutil.copytree(self.original_path, self.unpacked_path)
+        shutil.copytree(self.original_path, self.unpacked_path, copy_function=shutil.copyfile)
 
         # Pack original directory into temporary .docx for validation baseline (outside unpacked dir)
         self.original_docx = Path(self.temp_dir) / "original.docx"
@@ -881,7 +881,10 @@ class Document:
 
         # Copy contents from temp directory to destination (or original directory)
         target_path = Path(destination) if destination else self.original_path
-        shutil.copytree(self.unpacked_path, target_path, dirs_exist_ok=True)
+        # copyfile (kernel sendfile on Linux) without per-file copystat
+        shutil.copytree(
+            self.unpacked_path, target_path, dirs_exist_ok=True, copy_function=shutil.copyfile
+        )
 
     # ==================== Private: Initialization ====================
 
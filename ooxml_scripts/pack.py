@@ -15,6 +15,19 @@ import defusedxml.minidom
 import zipfile
 from pathlib import Path
 
+try:
+    from lxml import etree
+except ImportError:  # libxml2 unavailable, condense with minidom instead
+    etree = None
+
+# Read size for copying non-XML parts into the archive
+_COPY_BUFSIZE = 16 * 1024 * 1024
+
+# Image/media formats that are already compressed and are stored as-is
+_PRECOMPRESSED_SUFFIXES = frozenset(
+    {".png", ".jpg", ".jpeg", ".gif", ".wdp", ".emz", ".wmz", ".mp3", ".mp4"}
+)
+
 
 def main():
     parser = argparse.ArgumentParser(description="Pack a directory into an Office file")
@@ -42,13 +55,14 @@ def main():
         sys.exit(f"Error: {e}")
 
 
-def pack_document(input_dir, output_file, validate=False):
+def pack_document(input_dir, output_file, validate=False, compress=True):
     """Pack a directory into an Office file (.docx/.pptx/.xlsx).
 
     Args:
         input_dir: Path to unpacked Office document directory
         output_file: Path to output Office file
         validate: If True, validates with soffice (default: False)
+        compress: If False, stores every member uncompressed (fast, for throwaway files)
 
     Returns:
         bool: True if successful, False if validation failed
@@ -61,28 +75,28 @@ def pack_document(input_dir, output_file, validate=False):
     if output_file.suffix.lower() not in {".docx", ".pptx", ".xlsx"}:
         raise ValueError(f"{output_file} must be a .docx, .pptx, or .xlsx file")
 
-    # Work in temporary directory to avoid modifying original
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_content_dir = Path(temp_dir) / "content"
-        shutil.copytree(input_dir, temp_content_dir)
-
-        # Process XML files to remove pretty-printing whitespace
-        for pattern in ["*.xml", "*.rels"]:
-            for xml_file in temp_content_dir.rglob(pattern):
-                condense_xml(xml_file)
-
-        # Create final Office file as zip archive
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zf:
-            for f in temp_content_dir.rglob("*"):
-                if f.is_file():
-                    zf.write(f, f.relative_to(temp_content_dir))
-
-        # Validate if requested
-        if validate:
-            if not validate_document(output_file):
-                output_file.unlink()  # Delete the corrupt file
-                return False
+    # Condense XML parts in memory and stream everything straight into the
+    # archive; the original directory is never modified or copied
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    with zipfile.ZipFile(output_file, "w", compression) as zf:
+        for f in input_dir.rglob("*"):
+            if not f.is_file():
+                continue
+            arcname = f.relative_to(input_dir).as_posix()
+            if f.name.endswith((".xml", ".rels")):
+                _write_condensed_xml(zf, f, arcname)
+            elif f.suffix.lower() in _PRECOMPRESSED_SUFFIXES:
+                # Already-compressed media gains nothing from deflate
+                _write_member(zf, f, arcname, zipfile.ZIP_STORED)
+            else:
+                _write_member(zf, f, arcname, compression)
+
+    # Validate if requested
+    if validate:
+        if not validate_document(output_file):
+            output_file.unlink()  # Delete the corrupt file
+            return False
 
     return True
 
@@ -132,6 +146,74 @@ def validate_document(doc_path):
 
 def condense_xml(xml_file):
     """Strip unnecessary whitespace and remove comments."""
+    data = condensed_xml_bytes(xml_file)
+    with open(xml_file, "wb") as f:
+        f.write(data)
+
+
+def condensed_xml_bytes(xml_file):
+    """Return the condensed XML of xml_file as UTF-8 bytes (file is not modified)."""
+    if etree is None:
+        return _condensed_xml_bytes_minidom(xml_file)
+
+    tree = _condensed_tree(xml_file)
+    return etree.tostring(
+        tree,
+        xml_declaration=True,
+        encoding="UTF-8",
+        standalone=True if tree.docinfo.standalone else None,
+    )
+
+
+def _write_member(zf, path, arcname, compress_type):
+    """Stream a file into the archive with large reads instead of ZipFile.write's 8 KiB chunks."""
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    zinfo.compress_type = compress_type
+    size = zinfo.file_size
+    with open(path, "rb") as src, zf.open(
+        zinfo, "w", force_zip64=size >= zipfile.ZIP64_LIMIT
+    ) as dst:
+        shutil.copyfileobj(src, dst, length=max(1, min(size, _COPY_BUFSIZE)))
+
+
+def _write_condensed_xml(zf, xml_file, arcname):
+    """Condense xml_file and serialize it incrementally into archive member arcname."""
+    if etree is None:
+        zf.writestr(arcname, _condensed_xml_bytes_minidom(xml_file))
+        return
+
+    tree = _condensed_tree(xml_file)
+    with zf.open(arcname, "w") as member:
+        tree.write(
+            member,
+            xml_declaration=True,
+            encoding="UTF-8",
+            standalone=True if tree.docinfo.standalone else None,
+        )
+
+
+def _condensed_tree(xml_file):
+    """Parse xml_file with lxml and strip whitespace-only text and comments."""
+    parser = etree.XMLParser(
+        resolve_entities=False, no_network=True, huge_tree=True, remove_comments=True
+    )
+    tree = etree.parse(str(xml_file), parser)
+
+    # Drop whitespace-only text/tail nodes, leaving w:t content untouched
+    for element in tree.iter(etree.Element):
+        if element.prefix and element.tag.endswith("}t"):
+            continue
+        if element.text is not None and element.text.strip() == "":
+            element.text = None
+        for child in element:
+            if child.tail is not None and child.tail.strip() == "":
+                child.tail = None
+
+    return tree
+
+
+def _condensed_xml_bytes_minidom(xml_file):
+    """Pure-Python fallback for condensed_xml_bytes when lxml is not installed."""
     with open(xml_file, "r", encoding="utf-8") as f:
         dom = defusedxml.minidom.parse(f)
 
@@ -150,10 +232,7 @@ def condense_xml(xml_file):
             ) or child.nodeType == child.COMMENT_NODE:
                 element.removeChild(child)
 
-    # Write back the condensed XML
-    with open(xml_file, "wb") as f:
-        f.write(dom.toxml(encoding="UTF-8"))
-
+    return dom.toxml(encoding="UTF-8")
 
 if __name__ == "__main__":
     main()
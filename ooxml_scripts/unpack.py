@@ -2,28 +2,64 @@
 """Unpack and format XML contents of Office files (.docx, .pptx, .xlsx)"""
 
 import random
+import shutil
 import sys
 import defusedxml.minidom
 import zipfile
-from pathlib import Path
-
-# Get command line arguments
-assert len(sys.argv) == 3, "Usage: python unpack.py <office_file> <output_dir>"
-input_file, output_dir = sys.argv[1], sys.argv[2]
-
-# Extract and format
-output_path = Path(output_dir)
-output_path.mkdir(parents=True, exist_ok=True)
-zipfile.ZipFile(input_file).extractall(output_path)
-
-# Pretty print all XML files
-xml_files = list(output_path.rglob("*.xml")) + list(output_path.rglob("*.rels"))
-for xml_file in xml_files:
-    content = xml_file.read_text(encoding="utf-8")
-    dom = defusedxml.minidom.parseString(content)
-    xml_file.write_bytes(dom.toprettyxml(indent="  ", encoding="ascii"))
-
-# For .docx files, suggest an RSID for tracked changes
-if input_file.endswith(".docx"):
-    suggested_rsid = "".join(random.choices("0123456789ABCDEF", k=8))
-    print(f"Suggested RSID for edit session: {suggested_rsid}")
+from pathlib import Path, PurePosixPath
+
+
+def _member_path(output_path, member_name):
+    """Target path for an archive member, sanitized like ZipFile.extract."""
+    parts = [p for p in PurePosixPath(member_name.replace("\\", "/")).parts
+             if p not in ("", ".", "..", "/")]
+    return output_path.joinpath(*parts)
+
+
+# Read size for extracting non-XML parts (media etc.)
+_COPY_BUFSIZE = 16 * 1024 * 1024
+
+
+def unpack_document(input_file, output_dir):
+    """Extract an Office file and pretty print its XML parts.
+
+    Args:
+        input_file: Path to .docx/.pptx/.xlsx file
+        output_dir: Directory to extract into (created if missing)
+
+    Returns:
+        str: Suggested RSID for tracked changes (.docx only), otherwise None
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(input_file) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                _member_path(output_path, info.filename).mkdir(parents=True, exist_ok=True)
+                continue
+            if not info.filename.endswith((".xml", ".rels")):
+                # Stream with large reads instead of ZipFile.extract's small chunks
+                target = _member_path(output_path, info.filename)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                with zf.open(info) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst, length=max(1, min(info.file_size, _COPY_BUFSIZE)))
+                continue
+
+            # Pretty print XML parts straight from the archive instead of
+            # extracting them and reading them back
+            xml_file = _member_path(output_path, info.filename)
+            xml_file.parent.mkdir(parents=True, exist_ok=True)
+            dom = defusedxml.minidom.parseString(zf.read(info))
+            xml_file.write_bytes(dom.toprettyxml(indent="  ", encoding="ascii"))
+
+    # For .docx files, suggest an RSID for tracked changes
+    if str(input_file).endswith(".docx"):
+        return "".join(random.choices("0123456789ABCDEF", k=8))
+    return None
+
+
+if __name__ == "__main__":
+    assert len(sys.argv) == 3, "Usage: python unpack.py <office_file> <output_dir>"
+    suggested_rsid = unpack_document(sys.argv[1], sys.argv[2])
+    if suggested_rsid:
+        print(f"Suggested RSID for edit session: {suggested_rsid}")
@@ -1,8 +1,144 @@
 #!/usr/bin/env python3
 """Convert DOCX to markdown for agent to analyze"""
+import atexit
+import base64
+import json
+import os
+import socket
 import sys
 import subprocess
-import os
+import shutil
+import threading
+import time
+import urllib.request
+
+try:
+    import pypandoc
+except ImportError:  # optional, the pandoc binary is called directly otherwise
+    pypandoc = None
+
+
+# Optional long-lived `pandoc server` shared by every conversion in this process.
+# Off unless DOCX_PANDOC_SERVER=1: pandoc server has no host option and listens on
+# all interfaces, exposing an unauthenticated conversion endpoint to the network.
+_server = None            # (Popen, port) once started
+_server_failed = False    # pandoc missing or without server mode; don't keep trying
+_server_retry_at = 0.0    # monotonic time before which a timed-out start is not retried
+_server_backoff = 0.0     # seconds to wait after the next timed-out start
+_server_lock = threading.Lock()
+_SERVER_TIMEOUT = 60
+_SERVER_START_WAIT = 5
+_SERVER_MAX_BACKOFF = 300
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get_server_port():
+    """Start `pandoc server` on first use and return its port (None if unavailable)."""
+    global _server, _server_failed, _server_retry_at, _server_backoff
+    if os.environ.get("DOCX_PANDOC_SERVER") != "1" or _server_failed:
+        return None
+    with _server_lock:
+        if _server is not None and _server[0].poll() is None:
+            return _server[1]
+        if time.monotonic() < _server_retry_at:
+            return None
+        if shutil.which("pandoc") is None:
+            _server_failed = True
+            return None
+
+        port = _free_port()
+        proc = subprocess.Popen(
+            ["pandoc", "server", "--port", str(port)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        # Wait for the listener; an old pandoc without server mode just exits
+        deadline = time.monotonic() + _SERVER_START_WAIT
+        while time.monotonic() < deadline and proc.poll() is None:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                _server = (proc, port)
+                _server_backoff = 0.0
+                atexit.register(proc.terminate)
+                return port
+            except OSError:
+                time.sleep(0.05)
+        if proc.poll() is not None:
+            _server_failed = True
+            return None
+        # Still starting (slow cold start): give up for now, retry later with backoff
+        proc.terminate()
+        _server_backoff = min(max(_server_backoff * 2, _SERVER_START_WAIT), _SERVER_MAX_BACKOFF)
+        _server_retry_at = time.monotonic() + _server_backoff
+        return None
+
+
+def _convert_via_server(port, docx_path, output_md_path):
+    """POST the DOCX (base64, as pandoc server expects for binary input) and write the markdown."""
+    with open(docx_path, "rb") as f:
+        payload = {
+            "text": base64.b64encode(f.read()).decode("ascii"),
+            "from": "docx",
+            "to": "markdown",
+        }
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json", "Accept": "text/plain"},
+    )
+    with urllib.request.urlopen(request, timeout=_SERVER_TIMEOUT) as response:
+        markdown = response.read()
+    with open(output_md_path, "wb") as f:
+        f.write(markdown)
+
+
+def run(docx_path, output_md_path):
+    """
+    Convert DOCX to markdown in-process (raises on failure).
+
+    With DOCX_PANDOC_SERVER=1, uses a shared `pandoc server` so the Haskell
+    runtime starts once per process. Otherwise uses pypandoc when installed,
+    or runs the pandoc binary.
+
+    Raises:
+        FileNotFoundError: If pandoc is not installed
+        RuntimeError: If the conversion fails
+    """
+    port = _get_server_port()
+    if port is not None:
+        try:
+            _convert_via_server(port, docx_path, output_md_path)
+            return
+        except OSError:
+            pass  # server hiccup: fall back to a one-off pandoc run
+
+    if pypandoc is not None:
+        try:
+            pypandoc.convert_file(docx_path, "md", outputfile=output_md_path)
+            return
+        except OSError as e:
+            if "No pandoc was found" in str(e):
+                raise FileNotFoundError("pandoc not found. Install pandoc") from e
+            raise RuntimeError(f"Conversion failed: {e}") from e
+
+    if shutil.which("pandoc") is None:
+        raise FileNotFoundError("pandoc not found. Install pandoc")
+
+    try:
+        subprocess.run(
+            ["pandoc", docx_path, "-o", output_md_path],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Conversion failed: {e.stderr}") from e
+
 
 def docx_to_markdown(docx_path, output_md_path):
     """
@@ -15,31 +151,10 @@ def docx_to_markdown(docx_path, output_md_path):
     Returns:
         0 on success, 1 on failure
     """
-    # Check if pandoc is installed
-    try:
-        result = subprocess.run(
-            ["pandoc", "--version"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-    except FileNotFoundError:
-        print("ERROR: pandoc not found. Install pandoc", file=sys.stderr)
-        return 1
-
-    # Convert DOCX to markdown
     try:
-        result = subprocess.run(
-            ["pandoc", docx_path, "-o", output_md_path],
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        run(docx_path, output_md_path)
         print(f"Successfully converted {docx_path} to markdown")
         return 0
-    except subprocess.CalledProcessError as e:
-        print(f"ERROR: Conversion failed: {e.stderr}", file=sys.stderr)
-        return 1
     except Exception as e:
         print(f"ERROR: {str(e)}", file=sys.stderr)
         return 1
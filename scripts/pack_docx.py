@@ -2,29 +2,44 @@
 """Pack unpacked XML directory back to DOCX using local ooxml_scripts"""
 import sys
 import os
-import subprocess
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
-pack_script = os.path.join(current_dir, '..', 'ooxml_scripts', 'pack.py')
-
-if not os.path.exists(pack_script):
-    print(f"ERROR: pack.py not found at {pack_script}", file=sys.stderr)
-    sys.exit(1)
-
-try:
-    # Skip soffice validation by default (--force)
-    # Reasoning:
-    # 1. DOCX file creation is pure ZIP operations (doesn't need soffice)
-    # 2. XML validation already done in Phase 5 (ComprehensiveValidator)
-    # 3. soffice validation times out on large documents (10s timeout)
-    # 4. Validation is redundant - we already checked structure, well-formedness
-    #
-    # If validation is needed for debugging, use: python pack.py <dir> <file>
-    # (without this wrapper) to enable soffice validation
-
-    args = [sys.executable, pack_script] + sys.argv[1:] + ['--force']
-    result = subprocess.run(args, check=True)
-    sys.exit(result.returncode)
-except Exception as e:
-    print(f"ERROR: {e}", file=sys.stderr)
-    sys.exit(1)
+repo_root = os.path.dirname(current_dir)
+if repo_root not in sys.path:
+    sys.path.insert(0, repo_root)
+
+from ooxml_scripts.pack import pack_document
+
+
+def run(unpacked_dir, output_docx, compress=True):
+    """Pack unpacked_dir into output_docx in-process (raises on failure).
+
+    compress=False stores members uncompressed (ZIP_STORED) for throwaway
+    intermediate files, skipping zlib entirely.
+
+    Skips soffice validation (the equivalent of pack.py --force):
+    1. DOCX file creation is pure ZIP operations (doesn't need soffice)
+    2. XML validation already done in Phase 5 (ComprehensiveValidator)
+    3. soffice validation times out on large documents (10s timeout)
+    4. Validation is redundant - we already checked structure, well-formedness
+
+    If validation is needed for debugging, use: python ooxml_scripts/pack.py <dir> <file>
+    to enable soffice validation
+    """
+    pack_document(unpacked_dir, output_docx, validate=False, compress=compress)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    compress = '--no-compress' not in args
+    args = [a for a in args if a != '--no-compress']
+    if len(args) != 2:
+        print("Usage: python pack_docx.py <unpacked_dir> <output_docx> [--no-compress]", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        run(args[0], args[1], compress=compress)
+        print("Warning: Skipped validation, file may be corrupt", file=sys.stderr)
+    except Exception as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
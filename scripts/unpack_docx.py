@@ -2,21 +2,29 @@
 """Unpack DOCX to XML using local ooxml_scripts"""
 import sys
 import os
-import subprocess
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
-unpack_script = os.path.join(current_dir, '..', 'ooxml_scripts', 'unpack.py')
+repo_root = os.path.dirname(current_dir)
+if repo_root not in sys.path:
+    sys.path.insert(0, repo_root)
 
-if not os.path.exists(unpack_script):
-    print(f"ERROR: unpack.py not found at {unpack_script}", file=sys.stderr)
-    sys.exit(1)
+from ooxml_scripts.unpack import unpack_document
 
-try:
-    result = subprocess.run(
-        [sys.executable, unpack_script] + sys.argv[1:],
-        check=True
-    )
-    sys.exit(result.returncode)
-except Exception as e:
-    print(f"ERROR: {e}", file=sys.stderr)
-    sys.exit(1)
+
+def run(docx_path, output_dir):
+    """Unpack docx_path into output_dir in-process (raises on failure)."""
+    return unpack_document(docx_path, output_dir)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python unpack_docx.py <docx_file> <output_dir>", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        suggested_rsid = run(sys.argv[1], sys.argv[2])
+        if suggested_rsid:
+            print(f"Suggested RSID for edit session: {suggested_rsid}")
+    except Exception as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
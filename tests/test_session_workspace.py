@@ -0,0 +1,64 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents import docx_tools
+from agents.session_workspace import SessionWorkspaceManager
+
+
+def _make_docx(path: Path, image_bytes: bytes) -> None:
+    """Write a minimal DOCX with one XML part and one binary media part."""
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("[Content_Types].xml", '<?xml version="1.0"?><Types/>')
+        zf.writestr("word/document.xml", '<?xml version="1.0"?><document/>')
+        zf.writestr("word/media/image1.png", image_bytes)
+
+
+class TestCloneTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.workspace = SessionWorkspaceManager(str(self.tmp / "workspaces"))
+
+        self.template = self.tmp / "templateA"
+        (self.template / "word" / "media").mkdir(parents=True)
+        (self.template / "word" / "document.xml").write_bytes(b"<document/>")
+        self.image = self.template / "word" / "media" / "image1.png"
+        self.image.write_bytes(b"template A image")
+
+    def test_writes_into_clone_leave_template_untouched(self):
+        """Unpacking another DOCX over a cloned session must not reach the template."""
+        unpacked_dir = self.workspace.clone_template("s1", str(self.template))
+
+        other = self.tmp / "B.docx"
+        _make_docx(other, b"document B image")
+        result = docx_tools.unpack_docx(str(other), str(unpacked_dir))
+        self.assertIn("✅", result)
+
+        self.assertEqual((unpacked_dir / "word" / "media" / "image1.png").read_bytes(),
+                         b"document B image")
+        self.assertEqual(self.image.read_bytes(), b"template A image")
+        self.assertEqual(os.stat(self.image).st_nlink, 1)
+
+    def test_reclone_overwrites_session_copy(self):
+        """Cloning twice refreshes the session copy without touching the template."""
+        unpacked_dir = self.workspace.clone_template("s1", str(self.template))
+        (unpacked_dir / "word" / "media" / "image1.png").write_bytes(b"edited")
+
+        self.workspace.clone_template("s1", str(self.template))
+
+        self.assertEqual((unpacked_dir / "word" / "media" / "image1.png").read_bytes(),
+                         b"template A image")
+        self.assertEqual(self.image.read_bytes(), b"template A image")
+        self.assertEqual(os.stat(self.image).st_nlink, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()